@@ -0,0 +1,129 @@
+import hashlib
+import os
+import threading
+
+CACHE_DIR = ".jackcache"
+# Default cap on the total size of the cached vm files, in bytes
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+ENTRY_SUFFIX = ".vm"
+
+
+class BuildCache:
+    """
+    An on-disk cache of compiled vm files, keyed by a hash of the jack
+    source together with the compiler version and options. Entries are
+    evicted least recently used first once the cache outgrows its size cap;
+    an entry's modification time records its last use.
+    """
+
+    def __init__(self, version, options="", cache_dir=CACHE_DIR,
+                 max_size=DEFAULT_MAX_SIZE):
+        """
+        :param version: The version of the compiler, part of every key.
+        :param options: A string describing the options affecting the
+        output, part of every key.
+        :param cache_dir: The directory holding the cache.
+        :param max_size: The maximal total size of the entries, in bytes.
+        """
+        self.version = version
+        self.options = options
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def key(self, source):
+        """
+        :param source: The bytes of a jack file.
+        :return: The cache key of the file's vm code.
+        """
+        digest = hashlib.sha256()
+        digest.update("{}\0{}\0".format(self.version,
+                                        self.options).encode())
+        digest.update(source)
+        return digest.hexdigest()
+
+    def restore(self, key, out_address):
+        """
+        Makes out_address hold the cached vm code of the given key, leaving
+        it untouched if it already does.
+        :param key: The cache key.
+        :param out_address: The address of the vm file.
+        :return: True on a cache hit, False otherwise.
+        """
+        entry = self.__entry(key)
+        try:
+            with open(entry, 'rb') as f:
+                cached = f.read()
+        except OSError:
+            return False
+        try:
+            with open(out_address, 'rb') as f:
+                up_to_date = f.read() == cached
+        except OSError:
+            up_to_date = False
+        if not up_to_date:
+            self.__write_atomic(out_address, cached)
+        # Mark the entry as recently used
+        os.utime(entry)
+        return True
+
+    def store(self, key, out_address):
+        """
+        Stores the vm file at out_address as the entry of the given key.
+        :param key: The cache key.
+        :param out_address: The address of the compiled vm file.
+        """
+        with open(out_address, 'rb') as f:
+            compiled = f.read()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.__write_atomic(self.__entry(key), compiled)
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits its
+        size cap.
+        :return: The number of entries removed.
+        """
+        try:
+            entries = [entry for entry in os.scandir(self.cache_dir)
+                       if entry.name.endswith(ENTRY_SUFFIX)]
+        except OSError:
+            return 0
+        stats = []
+        for entry in entries:
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            stats.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in stats)
+        removed = 0
+        for _, size, path in sorted(stats):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def __entry(self, key):
+        return os.path.join(self.cache_dir, key + ENTRY_SUFFIX)
+
+    @staticmethod
+    def __write_atomic(address, data):
+        """
+        Writes data to address through a temporary file, so that concurrent
+        readers never see a partially written file.
+        """
+        temp = "{}.{}-{}.tmp".format(address, os.getpid(),
+                                     threading.get_ident())
+        try:
+            with open(temp, 'wb') as f:
+                f.write(data)
+            os.replace(temp, address)
+        except BaseException:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
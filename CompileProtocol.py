@@ -0,0 +1,147 @@
+"""
+The framed protocol between the compile server (JackAnalyzer --serve) and
+its clients, over a Unix domain socket. Every message is a json object,
+encoded as utf-8 and preceded by its length as a 4 byte big endian
+integer. A connection carries a single request and its response.
+
+Requests are either a command line:
+    {"argv": [...], "cwd": DIRECTORY, "stdin": TEXT}
+run by the server as JackAnalyzer would from DIRECTORY, with stdin, if
+given, as its standard input, answered with
+    {"status": N, "stdout": TEXT, "stderr": TEXT}
+or an inline source:
+    {"source": TEXT, "class_name": NAME, "options": {...}}
+with class_name optional and options as for JackAnalyzer's -O,
+--intern-strings and --inline-threshold ("optimize", "intern_strings",
+"inline_threshold"), answered with
+    {"status": 0, "vm": TEXT} or {"status": 1, "error": MESSAGE}
+with, for syntax errors, "diagnostics": [{"line", "column", "message"}].
+
+This module only imports the standard library, so that the client starts
+without loading the compiler.
+"""
+import json
+import os
+import socket
+import stat
+import struct
+import tempfile
+
+SOCKET_ENV = "JACK_SERVER_SOCKET"
+_LENGTH = struct.Struct(">I")
+# The pid, uid and gid of the peer of a Unix domain socket, see SO_PEERCRED
+_CREDENTIALS = struct.Struct("3i")
+# Seconds a peer may stay silent before giving up on it. A client waits
+# this long for the response, and compiles locally after it.
+REQUEST_TIMEOUT = 300
+# The largest message accepted, in bytes
+MAX_MESSAGE_SIZE = 256 * 1024 * 1024
+
+
+def socket_address():
+    """
+    :return: The address of the server's socket: $JACK_SERVER_SOCKET if it
+    is set, a socket of the user's in the runtime or temporary directory
+    otherwise.
+    """
+    address = os.environ.get(SOCKET_ENV)
+    if address:
+        return address
+    directory = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(directory, "jackanalyzer-{}.sock".format(
+        os.getuid()))
+
+
+def send_message(sock, message):
+    """
+    :param sock: A connected socket.
+    :param message: The json serializable message to send.
+    """
+    data = json.dumps(message).encode("utf-8")
+    sock.sendall(_LENGTH.pack(len(data)) + data)
+
+
+def receive_message(sock):
+    """
+    :param sock: A connected socket.
+    :return: The message received, None if the peer closed the connection
+    before sending one.
+    """
+    header = _receive_exactly(sock, _LENGTH.size)
+    if header is None:
+        return None
+    length, = _LENGTH.unpack(header)
+    if length > MAX_MESSAGE_SIZE:
+        raise ValueError("message of {} bytes exceeds the limit of "
+                         "{}".format(length, MAX_MESSAGE_SIZE))
+    data = _receive_exactly(sock, length)
+    if data is None:
+        raise ConnectionError("connection closed mid message")
+    return json.loads(data.decode("utf-8"))
+
+
+def _receive_exactly(sock, size):
+    """
+    :return: The next size bytes from the socket, None if it was closed
+    before any of them arrived.
+    """
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = sock.recv(remaining)
+        if not chunk:
+            if remaining == size:
+                return None
+            raise ConnectionError("connection closed mid message")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def connect(address=None, timeout=REQUEST_TIMEOUT):
+    """
+    :param address: The address of the server's socket, socket_address()
+    if not given.
+    :param timeout: The seconds any operation on the socket may take, None
+    to wait for ever.
+    :return: A socket connected to the server, None if no server of the
+    user's is listening there. The socket may be in a shared directory,
+    where another user could serve code of their choosing: the socket file
+    and the process listening on it must both belong to the user.
+    """
+    address = address or socket_address()
+    try:
+        status = os.stat(address)
+    except FileNotFoundError:
+        return None
+    if not stat.S_ISSOCK(status.st_mode) or status.st_uid != os.getuid():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(address)
+    except (FileNotFoundError, ConnectionRefusedError, TimeoutError):
+        sock.close()
+        return None
+    if hasattr(socket, "SO_PEERCRED"):
+        _, uid, _ = _CREDENTIALS.unpack(sock.getsockopt(
+            socket.SOL_SOCKET, socket.SO_PEERCRED, _CREDENTIALS.size))
+        if uid != os.getuid():
+            sock.close()
+            return None
+    return sock
+
+
+def request(message, address=None):
+    """
+    Sends a request to the server and waits for its response.
+    :param message: The request.
+    :param address: The address of the server's socket, if not the default.
+    :return: The response, None if no server is listening.
+    """
+    sock = connect(address)
+    if sock is None:
+        return None
+    with sock:
+        send_message(sock, message)
+        return receive_message(sock)
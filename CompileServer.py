@@ -0,0 +1,175 @@
+import io
+import os
+import signal
+import socket
+import sys
+from contextlib import redirect_stdout, redirect_stderr
+from CompilationEngine import Compiler, DEFAULT_INLINE_THRESHOLD
+from Diagnostics import CompileError
+from CompileProtocol import socket_address, send_message, receive_message
+from CompileProtocol import connect, REQUEST_TIMEOUT
+
+# Connections waiting to be accepted at most
+BACKLOG = 64
+
+
+class CompileServer:
+    """
+    A long lived compiler listening on a Unix domain socket, see
+    CompileProtocol. Its modules, regular expressions and parser tables are
+    loaded once, so that a request only pays for the compilation itself.
+    Requests are served one at a time, in the order they connect.
+    """
+
+    def __init__(self, run, optimization_passes, address=None):
+        """
+        :param run: The function running a JackAnalyzer command line, given
+        its arguments, returning its exit status.
+        :param optimization_passes: The function returning new instances of
+        the optimization passes of -O, by their names.
+        :param address: The address of the socket to listen on,
+        socket_address() if not given.
+        """
+        self.run = run
+        self.optimization_passes = optimization_passes
+        self.address = address or socket_address()
+        self.sock = None
+
+    def serve_forever(self):
+        """
+        Serves requests until interrupted or terminated, then removes the
+        socket.
+        """
+        self.__bind()
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            while True:
+                connection, _ = self.sock.accept()
+                # A stalled client must not hold up the others for ever
+                connection.settimeout(REQUEST_TIMEOUT)
+                with connection:
+                    self.__handle(connection)
+        finally:
+            self.sock.close()
+            os.remove(self.address)
+
+    def __bind(self):
+        if os.path.exists(self.address):
+            running = connect(self.address)
+            if running is not None:
+                running.close()
+                raise RuntimeError("a server is already listening on "
+                                   "{}".format(self.address))
+            # Left behind by a server that did not exit cleanly
+            os.remove(self.address)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Only the user may connect: requests read and write their files
+        umask = os.umask(0o177)
+        try:
+            self.sock.bind(self.address)
+        finally:
+            os.umask(umask)
+        self.sock.listen(BACKLOG)
+
+    def __handle(self, connection):
+        """
+        Answers the request of a connection. A failing request, or a client
+        going away, never stops the server.
+        """
+        try:
+            message = receive_message(connection)
+            if message is None:
+                return
+            if "source" in message:
+                response = self.compile_source(message)
+            elif "argv" in message:
+                response = self.run_command(message)
+            else:
+                response = {"status": 2, "error": "unknown request"}
+        except Exception as e:
+            response = {"status": 2, "error": "bad request: {}: {}".format(
+                type(e).__name__, e)}
+        try:
+            send_message(connection, response)
+        except OSError:
+            pass
+
+    def run_command(self, message):
+        """
+        Runs a command line from the client's working directory, capturing
+        its output.
+        :param message: The request, holding argv and cwd, and the
+        standard input of the client if it is read.
+        :return: The response, holding the exit status and the output.
+        """
+        argv = [str(arg) for arg in message["argv"]]
+        for arg in ("--serve", "--watch"):
+            if arg in argv:
+                return {"status": 2, "stdout": "",
+                        "stderr": "{} is not allowed in a request\n".format(
+                            arg)}
+        out = io.StringIO()
+        err = io.StringIO()
+        previous = os.getcwd()
+        stdin = sys.stdin
+        try:
+            os.chdir(message.get("cwd", previous))
+            # Forwarded by the client for --files-from -
+            sys.stdin = io.StringIO(message.get("stdin", ""))
+            with redirect_stdout(out), redirect_stderr(err):
+                try:
+                    status = self.run(argv)
+                except SystemExit as e:
+                    status = e.code if isinstance(e.code, int) else \
+                        int(e.code is not None)
+                except Exception as e:
+                    print("{}: {}".format(type(e).__name__, e),
+                          file=sys.stderr)
+                    status = 1
+        finally:
+            sys.stdin = stdin
+            os.chdir(previous)
+        return {"status": status, "stdout": out.getvalue(),
+                "stderr": err.getvalue()}
+
+    def compile_source(self, message):
+        """
+        Compiles an inline source.
+        :param message: The request, holding the source, and the class
+        name and options if given.
+        :return: The response, holding the vm code, or the error and the
+        syntax errors if there are any.
+        """
+        try:
+            compiler = self.__compiler(message.get("options"))
+            vm = compiler.compile(message["source"],
+                                  message.get("class_name"))
+        except CompileError as e:
+            return {"status": 1, "error": str(e),
+                    "diagnostics": [diagnostic.to_dict()
+                                    for diagnostic in e.diagnostics]}
+        except Exception as e:
+            return {"status": 1, "error": "{}: {}".format(type(e).__name__,
+                                                           e)}
+        return {"status": 0, "vm": vm}
+
+    def __compiler(self, options):
+        """
+        :param options: The options of an inline source request, if any.
+        :return: A Compiler with the options.
+        :raise ValueError: If the options are not valid.
+        """
+        if options is None:
+            options = {}
+        if not isinstance(options, dict):
+            raise ValueError("options must be an object")
+        inline_threshold = options.get("inline_threshold",
+                                       DEFAULT_INLINE_THRESHOLD)
+        if type(inline_threshold) is not int or inline_threshold < 0:
+            raise ValueError("inline_threshold must be a non-negative "
+                             "integer")
+        passes = ()
+        if options.get("optimize"):
+            passes = tuple(self.optimization_passes().values())
+        return Compiler(passes, bool(options.get("intern_strings")),
+                        inline_threshold)
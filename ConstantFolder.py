@@ -0,0 +1,66 @@
+"""
+Evaluation of constant Jack expressions at compile time, with the semantics
+of the Hack platform: 16 bit two's complement words, where true is -1 (all
+bits set) and false is 0.
+"""
+WORD_SIZE = 1 << 16
+SIGN_BIT = 1 << 15
+# The largest integer constant allowed in Jack source
+MAX_INT = SIGN_BIT - 1
+TRUE = -1
+FALSE = 0
+
+
+def to_word(value):
+    """
+    :param value: An integer.
+    :return: The value truncated to a signed 16 bit word.
+    """
+    value &= WORD_SIZE - 1
+    return value - WORD_SIZE if value & SIGN_BIT else value
+
+
+def fold_unary(op, value):
+    """
+    :param op: A unary operator, - or ~.
+    :param value: The constant operand.
+    :return: The result of the operation.
+    """
+    if op == "-":
+        return to_word(-value)
+    return to_word(~value)
+
+
+def fold_binary(op, left, right):
+    """
+    :param op: A binary operator.
+    :param left: The constant left operand.
+    :param right: The constant right operand.
+    :return: The result of the operation, or None if it cannot be computed
+    at compile time (division by zero, which is an error at run time).
+    """
+    if op == "+":
+        return to_word(left + right)
+    if op == "-":
+        return to_word(left - right)
+    if op == "*":
+        return to_word(left * right)
+    if op == "/":
+        if right == 0:
+            return None
+        # Math.divide rounds toward zero
+        quotient = abs(left) // abs(right)
+        if (left < 0) != (right < 0):
+            quotient = -quotient
+        return to_word(quotient)
+    if op == "&":
+        return to_word(left & right)
+    if op == "|":
+        return to_word(left | right)
+    if op == "<":
+        return TRUE if left < right else FALSE
+    if op == ">":
+        return TRUE if left > right else FALSE
+    if op == "=":
+        return TRUE if left == right else FALSE
+    return None
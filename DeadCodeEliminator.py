@@ -0,0 +1,168 @@
+from ConstantFolder import fold_unary
+from SourceMap import keep_line
+
+_FUNCTION = "function "
+_GOTO = "goto "
+_IF_GOTO = "if-goto "
+_LABEL = "label "
+_COMMENT = "//"
+_PUSH_CONSTANT = "push constant "
+_UNARY_COMMANDS = {"not": "~", "neg": "-"}
+
+
+class DeadCodeEliminator:
+    """
+    Removes the vm commands no execution of their function can reach, and
+    the labels nothing jumps to. Branches on a constant condition become a
+    goto, or nothing, first. Labels keep their names.
+    """
+
+    def __init__(self):
+        # The number of commands removed from each function, by its name
+        self.stats = {}
+
+    def run(self, commands):
+        """
+        Optimizes a list of commands.
+        :param commands: The commands of one or more whole functions.
+        :return: The optimized list of commands.
+        """
+        out = []
+        for function in self.__split(commands):
+            optimized = self.optimize_function(function)
+            removed = len(function) - len(optimized)
+            if removed and function[0].startswith(_FUNCTION):
+                name = function[0].split()[1]
+                self.stats[name] = self.stats.get(name, 0) + removed
+            out.extend(optimized)
+        return out
+
+    def optimize_function(self, commands):
+        """
+        :param commands: The commands of a single function.
+        :return: The commands without dead code.
+        """
+        commands = self.__fold_branches(commands)
+        while True:
+            reachable = self.__reachable(commands)
+            kept = [command for command, live in zip(commands, reachable)
+                    if live or command.startswith(_COMMENT)]
+            kept = self.__remove_unused_labels(kept)
+            if len(kept) == len(commands):
+                return kept
+            commands = kept
+
+    @staticmethod
+    def __split(commands):
+        """
+        :return: The commands, split to lists starting at each function.
+        """
+        functions = []
+        for command in commands:
+            if command.startswith(_FUNCTION) or not functions:
+                functions.append([])
+            functions[-1].append(command)
+        return functions
+
+    @staticmethod
+    def __fold_branches(commands):
+        """
+        Replaces if-gotos on a constant (a constant push, possibly negated
+        or complemented) with a goto if it is true, or nothing if it is
+        false.
+        """
+        out = []
+        # The first command of a folded branch, whose source line the next
+        # command takes over
+        replaced = None
+        for command in commands:
+            if command.startswith(_IF_GOTO):
+                start = len(out)
+                while start > 0 and out[start - 1] in _UNARY_COMMANDS:
+                    start -= 1
+                if start > 0 and out[start - 1].startswith(_PUSH_CONSTANT):
+                    value = int(out[start - 1][len(_PUSH_CONSTANT):])
+                    for unary in out[start:]:
+                        value = fold_unary(_UNARY_COMMANDS[unary], value)
+                    replaced = keep_line(replaced, out[start - 1])
+                    del out[start - 1:]
+                    if value == 0:
+                        continue
+                    command = _GOTO + command[len(_IF_GOTO):]
+            if replaced is not None:
+                command = keep_line(replaced, command)
+                replaced = None
+            out.append(command)
+        return out
+
+    @staticmethod
+    def __reachable(commands):
+        """
+        :return: A list telling for each command if it can be reached from
+        the start of the function.
+        """
+        labels = {command[len(_LABEL):]: index
+                  for index, command in enumerate(commands)
+                  if command.startswith(_LABEL)}
+        reachable = [False] * len(commands)
+        pending = [0]
+        while pending:
+            index = pending.pop()
+            # Follow the straight line of execution from index
+            while index is not None and index < len(commands) and \
+                    not reachable[index]:
+                reachable[index] = True
+                command = commands[index]
+                if command.startswith(_GOTO):
+                    index = labels.get(command[len(_GOTO):])
+                    continue
+                if command.startswith(_IF_GOTO):
+                    target = labels.get(command[len(_IF_GOTO):])
+                    if target is not None:
+                        pending.append(target)
+                elif command == "return":
+                    break
+                index += 1
+        return reachable
+
+    @staticmethod
+    def __remove_unused_labels(commands):
+        """
+        Removes the labels nothing jumps to, and gotos to the very next
+        command.
+        """
+        used = set()
+        for index, command in enumerate(commands):
+            if command.startswith(_GOTO):
+                # A goto to the label right after it is a no-op
+                if index + 1 < len(commands) and \
+                        commands[index + 1] == _LABEL + command[len(_GOTO):]:
+                    continue
+                used.add(command[len(_GOTO):])
+            elif command.startswith(_IF_GOTO):
+                used.add(command[len(_IF_GOTO):])
+        out = []
+        replaced = None
+        for index, command in enumerate(commands):
+            if command.startswith(_LABEL):
+                if command[len(_LABEL):] not in used:
+                    replaced = keep_line(replaced, command)
+                    continue
+            elif command.startswith(_GOTO) and index + 1 < len(commands) \
+                    and commands[index + 1] == \
+                    _LABEL + command[len(_GOTO):]:
+                replaced = keep_line(replaced, command)
+                continue
+            if replaced is not None:
+                command = keep_line(replaced, command)
+                replaced = None
+            out.append(command)
+        return out
+
+    def report(self):
+        """
+        :return: Lines describing how many commands were removed from each
+        function that had dead code.
+        """
+        return ["{}: {} commands removed".format(name, removed)
+                for name, removed in self.stats.items()]
@@ -0,0 +1,59 @@
+class Diagnostic:
+    """
+    An error found in a jack source, at a line and column of it.
+    """
+    __slots__ = ("line", "column", "message")
+
+    def __init__(self, line, column, message):
+        """
+        :param line: The line of the error, counted from 1.
+        :param column: The column of the error, counted from 1.
+        :param message: What is wrong.
+        """
+        self.line = line
+        self.column = column
+        self.message = message
+
+    def to_dict(self):
+        """
+        :return: The diagnostic as a json serializable dict, as the batch
+        driver collects them.
+        """
+        return {"line": self.line, "column": self.column,
+                "message": self.message}
+
+    def __str__(self):
+        return "{}:{}: {}".format(self.line, self.column, self.message)
+
+
+class CompileError(Exception):
+    """
+    Raised when a source has errors, once all of them were found.
+    """
+
+    def __init__(self, diagnostics):
+        """
+        :param diagnostics: The Diagnostics, in the order of the source.
+        """
+        self.diagnostics = diagnostics
+        first = diagnostics[0]
+        if len(diagnostics) == 1:
+            message = str(first)
+        else:
+            message = "{} errors, the first at {}".format(len(diagnostics),
+                                                           first)
+        super().__init__(message)
+
+
+def format_diagnostic(address, diagnostic):
+    """
+    :param address: The address of the file the diagnostic is about.
+    :param diagnostic: A diagnostic dict, see Diagnostic.to_dict. Errors
+    that are not about a place in the file have no line and column.
+    :return: The diagnostic as a line of text, as compilers report them.
+    """
+    if diagnostic.get("line") is None:
+        return "{}: {}".format(address, diagnostic["message"])
+    return "{}:{}:{}: {}".format(address, diagnostic["line"],
+                                 diagnostic["column"],
+                                 diagnostic["message"])
@@ -0,0 +1,298 @@
+"""
+The abstract syntax tree of a Jack class, built once by the Parser and shared
+by every consumer of the parse: the vm code generator, the xml serializer and
+any pass over the tree. Nodes only keep what the grammar does not imply, such
+as names, types, operators and constants, and not the punctuation around
+them. Subroutines and statements also keep their offset in the source, for
+source maps. Each node calls the visitor method of its own type in accept,
+so a visitor is any object with the visit methods of the nodes it is given.
+"""
+
+
+class Class:
+    __slots__ = ("name", "var_decs", "subroutines")
+
+    def __init__(self, name, var_decs, subroutines):
+        """
+        :param name: The name of the class.
+        :param var_decs: The ClassVarDec nodes, in order.
+        :param subroutines: The Subroutine nodes, in order.
+        """
+        self.name = name
+        self.var_decs = var_decs
+        self.subroutines = subroutines
+
+    def accept(self, visitor):
+        return visitor.visit_class(self)
+
+
+class ClassVarDec:
+    __slots__ = ("kind", "var_type", "names")
+
+    def __init__(self, kind, var_type, names):
+        """
+        :param kind: static or field.
+        :param var_type: The type of the variables.
+        :param names: The names of the variables, in order.
+        """
+        self.kind = kind
+        self.var_type = var_type
+        self.names = names
+
+    def accept(self, visitor):
+        return visitor.visit_class_var_dec(self)
+
+
+class Subroutine:
+    __slots__ = ("kind", "return_type", "name", "parameters", "var_decs",
+                 "statements", "start")
+
+    def __init__(self, kind, return_type, name, parameters, var_decs,
+                 statements, start=0):
+        """
+        :param kind: constructor, function or method.
+        :param return_type: The return type, void included.
+        :param name: The name of the subroutine.
+        :param parameters: (type, name) pairs, in order.
+        :param var_decs: The VarDec nodes, in order.
+        :param statements: The statement nodes of the body.
+        :param start: The offset of its first token in the source.
+        """
+        self.kind = kind
+        self.return_type = return_type
+        self.name = name
+        self.parameters = parameters
+        self.var_decs = var_decs
+        self.statements = statements
+        self.start = start
+
+    def accept(self, visitor):
+        return visitor.visit_subroutine(self)
+
+
+class VarDec:
+    __slots__ = ("var_type", "names")
+
+    def __init__(self, var_type, names):
+        """
+        :param var_type: The type of the variables.
+        :param names: The names of the variables, in order.
+        """
+        self.var_type = var_type
+        self.names = names
+
+    def accept(self, visitor):
+        return visitor.visit_var_dec(self)
+
+
+# ========== Statements ========== #
+
+class Let:
+    __slots__ = ("name", "index", "value", "start")
+
+    def __init__(self, name, index, value, start=0):
+        """
+        :param name: The name of the variable assigned.
+        :param index: The index Expression for let name[index], else None.
+        :param value: The Expression assigned.
+        :param start: The offset of its first token in the source.
+        """
+        self.name = name
+        self.index = index
+        self.value = value
+        self.start = start
+
+    def accept(self, visitor):
+        return visitor.visit_let(self)
+
+
+class If:
+    __slots__ = ("condition", "statements", "else_statements", "start")
+
+    def __init__(self, condition, statements, else_statements, start=0):
+        """
+        :param condition: The condition Expression.
+        :param statements: The statements run if it is true.
+        :param else_statements: The statements of the else clause, None if
+        there is none.
+        :param start: The offset of its first token in the source.
+        """
+        self.condition = condition
+        self.statements = statements
+        self.else_statements = else_statements
+        self.start = start
+
+    def accept(self, visitor):
+        return visitor.visit_if(self)
+
+
+class While:
+    __slots__ = ("condition", "statements", "start")
+
+    def __init__(self, condition, statements, start=0):
+        """
+        :param condition: The condition Expression.
+        :param statements: The statements of the loop's body.
+        :param start: The offset of its first token in the source.
+        """
+        self.condition = condition
+        self.statements = statements
+        self.start = start
+
+    def accept(self, visitor):
+        return visitor.visit_while(self)
+
+
+class Do:
+    __slots__ = ("call", "start")
+
+    def __init__(self, call, start=0):
+        """
+        :param call: The SubroutineCall.
+        :param start: The offset of its first token in the source.
+        """
+        self.call = call
+        self.start = start
+
+    def accept(self, visitor):
+        return visitor.visit_do(self)
+
+
+class Return:
+    __slots__ = ("value", "start")
+
+    def __init__(self, value, start=0):
+        """
+        :param value: The Expression returned, None for a bare return.
+        :param start: The offset of its first token in the source.
+        """
+        self.value = value
+        self.start = start
+
+    def accept(self, visitor):
+        return visitor.visit_return(self)
+
+
+# ========== Expressions ========== #
+
+class Expression:
+    __slots__ = ("term", "operations")
+
+    def __init__(self, term, operations):
+        """
+        :param term: The first term.
+        :param operations: (operator, term) pairs applied to it from left to
+        right.
+        """
+        self.term = term
+        self.operations = operations
+
+    def accept(self, visitor):
+        return visitor.visit_expression(self)
+
+
+class IntegerConstant:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        """
+        :param value: The text of the constant.
+        """
+        self.value = value
+
+    def accept(self, visitor):
+        return visitor.visit_integer_constant(self)
+
+
+class StringConstant:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        """
+        :param value: The string, without the quotes.
+        """
+        self.value = value
+
+    def accept(self, visitor):
+        return visitor.visit_string_constant(self)
+
+
+class KeywordConstant:
+    __slots__ = ("word",)
+
+    def __init__(self, word):
+        """
+        :param word: true, false, null or this.
+        """
+        self.word = word
+
+    def accept(self, visitor):
+        return visitor.visit_keyword_constant(self)
+
+
+class VarName:
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+    def accept(self, visitor):
+        return visitor.visit_var_name(self)
+
+
+class ArrayAccess:
+    __slots__ = ("name", "index")
+
+    def __init__(self, name, index):
+        """
+        :param name: The name of the array variable.
+        :param index: The index Expression.
+        """
+        self.name = name
+        self.index = index
+
+    def accept(self, visitor):
+        return visitor.visit_array_access(self)
+
+
+class SubroutineCall:
+    __slots__ = ("receiver", "name", "arguments")
+
+    def __init__(self, receiver, name, arguments):
+        """
+        :param receiver: The class or variable name before the dot, None for
+        a call of a method of this.
+        :param name: The name of the subroutine.
+        :param arguments: The argument Expressions, in order.
+        """
+        self.receiver = receiver
+        self.name = name
+        self.arguments = arguments
+
+    def accept(self, visitor):
+        return visitor.visit_subroutine_call(self)
+
+
+class Parenthesized:
+    __slots__ = ("expression",)
+
+    def __init__(self, expression):
+        self.expression = expression
+
+    def accept(self, visitor):
+        return visitor.visit_parenthesized(self)
+
+
+class UnaryOp:
+    __slots__ = ("op", "term")
+
+    def __init__(self, op, term):
+        """
+        :param op: - or ~.
+        :param term: The operand term.
+        """
+        self.op = op
+        self.term = term
+
+    def accept(self, visitor):
+        return visitor.visit_unary_op(self)
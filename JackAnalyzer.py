@@ -1,31 +1,636 @@
 import sys
 import os
-from CompilationEngine import CompilationEngine
+import argparse
+import json
+import time
+import cProfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from CompilationEngine import CompilationEngine, VERSION
+from CompilationEngine import DEFAULT_INLINE_THRESHOLD
+from BuildCache import BuildCache, CACHE_DIR, DEFAULT_MAX_SIZE
+from PeepholeOptimizer import PeepholeOptimizer
+from DeadCodeEliminator import DeadCodeEliminator
+from TreeShaker import TreeShaker
+from Profiler import Profile
+from CompileProtocol import SOCKET_ENV
+from Watcher import create_watcher, snapshot, changed_files
+from Diagnostics import CompileError, format_diagnostic
+from SourceMap import SourceMap, MAP_SUFFIX
 from pathlib import Path
 
+JACK_SUFFIX = ".jack"
+VM_SUFFIX = ".vm"
+# Tasks handed to each worker process at least, per map chunk
+TASKS_PER_WORKER = 4
+# Seconds the watched files must stay unchanged before a rebuild
+DEBOUNCE_DELAY = 0.05
 
-def analyze_dir(arg):
+
+def dir_files(arg):
+    """
+    :param arg: The address of a directory.
+    :return: The addresses of the jack files in it, sorted.
+    """
     dir_path = Path(arg)
-    for file in os.listdir(arg):
-        if file.endswith(".jack"):
-            file_path = str(dir_path / file)
+    return sorted(str(dir_path / file) for file in os.listdir(arg)
+                  if file.endswith(JACK_SUFFIX))
+
 
-            analyze_file(file_path)
+def collect_files(args):
+    """
+    :param args: The files and directories given on the command line.
+    :return: The addresses of all jack files to compile, in a deterministic
+    order: arguments in the order given, directories sorted by name.
+    """
+    files = []
+    for arg in args:
+        if os.path.isdir(arg):
+            files.extend(dir_files(arg))
+        else:
+            files.append(arg)
+    return files
 
 
-def analyze_file(address):
-    engine = CompilationEngine(address)
+def analyze_file(address, cache=None, optimize=False, engine_options=None,
+                 profile=None, vm_address=None):
+    """
+    Compiles a jack file to a vm file, next to it unless told otherwise.
+    :param address: The address of the jack file.
+    :param cache: A BuildCache to reuse and store the vm code in, if any.
+    :param optimize: True to run the peephole optimizer and dead code
+    elimination on the vm code.
+    :param engine_options: Keyword arguments for the CompilationEngine.
+    :param profile: A Profile to record the compilation in, if any.
+    :param vm_address: The address of the vm file to write, if not next to
+    the jack file. Its directory is created if missing.
+    :return: The statistics of each optimization pass by its name, None if
+    they did not run.
+    """
+    if vm_address is None:
+        vm_address = vm_address_of(address)
+    else:
+        os.makedirs(os.path.dirname(vm_address) or ".", exist_ok=True)
+    key = None
+    if cache is not None:
+        with open(address, 'rb') as f:
+            key = cache.key(f.read())
+        if cache.restore(key, vm_address):
+            if profile is not None:
+                profile.cached = True
+            return None
+    passes = optimization_passes() if optimize else {}
+    engine = CompilationEngine(address, tuple(passes.values()),
+                               profile=profile, vm_address=vm_address,
+                               **(engine_options or {}))
     engine.write_file()
+    if key is not None:
+        cache.store(key, engine.vm_writer.out_address)
+    if not optimize:
+        return None
+    return {name: optimization.stats
+            for name, optimization in passes.items()}
+
+
+def vm_address_of(address):
+    """
+    :return: The address of the vm file next to a jack file.
+    """
+    return address.replace(JACK_SUFFIX, VM_SUFFIX)
+
+
+def optimization_passes():
+    """
+    :return: New instances of the optimization passes of -O, in the order
+    they run, by their names.
+    """
+    return {"peephole": PeepholeOptimizer(),
+            "dead code": DeadCodeEliminator()}
+
+
+def compile_task(address, vm_address=None, cache=None, optimize=False,
+                 engine_options=None, profile=False):
+    """
+    Compiles a single file, catching any failure so that one bad file does
+    not take down a worker process or the rest of the run.
+    :param address: The address of the jack file.
+    :param vm_address: The address of the vm file, if not next to it.
+    :param cache: A BuildCache to compile through, if any.
+    :param optimize: True to run the optimization passes.
+    :param engine_options: Keyword arguments for the CompilationEngine.
+    :param profile: True to profile the compilation.
+    :return: The errors of the file as diagnostic dicts (see Diagnostic),
+    None if the file compiled, the optimization passes' statistics if they
+    ran, and the Profile of the file if it was profiled. Failures other
+    than syntax errors are a single diagnostic without a line and column.
+    """
+    file_profile = Profile(address) if profile else None
+    try:
+        return None, analyze_file(address, cache, optimize, engine_options,
+                                  file_profile, vm_address), file_profile
+    except CompileError as e:
+        return [diagnostic.to_dict() for diagnostic in e.diagnostics], \
+            None, file_profile
+    except SystemExit as e:
+        return [{"message": "compilation stopped (exit status {})".format(
+            e.code)}], None, file_profile
+    except Exception as e:
+        return [{"message": "{}: {}".format(type(e).__name__, e)}], None, \
+            file_profile
+
+
+def analyze_files(files, jobs=1, cache=None, optimize=False,
+                  engine_options=None, profile=False, vm_addresses=None,
+                  report=None):
+    """
+    Compiles the given files, in worker processes if more than one job is
+    allowed and there is more than one file.
+    :param files: The addresses of the jack files.
+    :param jobs: The maximal number of worker processes.
+    :param cache: A BuildCache to compile through, if any.
+    :param optimize: True to run the optimization passes.
+    :param engine_options: Keyword arguments for the CompilationEngine.
+    :param profile: True to profile the compilation of every file.
+    :param vm_addresses: The addresses of the vm files to write, in the
+    order of the files, None for a file's to be next to it. All of them
+    are next to their files if not given.
+    :param report: A function to call with the address, the vm address and
+    the errors or None of each file as soon as it is compiled, in the
+    order of the files, if any.
+    :return: The (address, errors) pairs of the files that failed, in the
+    order of the files, with the errors as diagnostic dicts (see
+    compile_task), the statistics of each optimization pass
+    summed over the compiled files, and the Profiles of the files if they
+    were profiled.
+    """
+    task = partial(compile_task, cache=cache, optimize=optimize,
+                   engine_options=engine_options, profile=profile)
+    if vm_addresses is None:
+        vm_addresses = [None] * len(files)
+    if jobs <= 1 or len(files) <= 1:
+        results = map(task, files, vm_addresses)
+        executor = None
+    else:
+        jobs = min(jobs, len(files))
+        chunk_size = max(1, len(files) // (jobs * TASKS_PER_WORKER))
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        # map keeps the order of the files, whatever order they finish
+        results = executor.map(task, files, vm_addresses,
+                               chunksize=chunk_size)
+    errors = []
+    stats = {}
+    profiles = []
+    try:
+        for address, vm_address, result in zip(files, vm_addresses,
+                                               results):
+            file_errors, file_stats, file_profile = result
+            if report is not None:
+                report(address, vm_address or vm_address_of(address),
+                       file_errors)
+            if file_errors is not None:
+                errors.append((address, file_errors))
+            if file_profile is not None:
+                profiles.append(file_profile)
+            for pass_name, pass_stats in (file_stats or {}).items():
+                totals = stats.setdefault(pass_name, {})
+                for name, removed in pass_stats.items():
+                    totals[name] = totals.get(name, 0) + removed
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return errors, stats, profiles
+
+
+def shake_programs(files, failed=(), vm_addresses=None, source_maps=False):
+    """
+    Removes the functions unreachable from the entry points from the vm
+    files compiled from the given jack files. The files of each directory
+    form one program.
+    :param files: The addresses of the compiled jack files.
+    :param failed: The addresses of files that failed to compile, whose
+    programs are left as they are.
+    :param vm_addresses: The addresses of the vm files, as for
+    analyze_files.
+    :param source_maps: True if the vm files have source maps, to update
+    along with them.
+    :return: The TreeShaker, holding the statistics.
+    """
+    if vm_addresses is None:
+        vm_addresses = [None] * len(files)
+    programs = {}
+    for address, vm_address in zip(files, vm_addresses):
+        directory = os.path.dirname(os.path.abspath(address))
+        programs.setdefault(directory, []).append(
+            (address, vm_address or vm_address_of(address)))
+    shaker = TreeShaker()
+    for addresses in programs.values():
+        if any(address in failed for address, _ in addresses):
+            continue
+        program = {}
+        source_map = {}
+        for _, out_address in addresses:
+            with open(out_address, 'r') as f:
+                program[out_address] = f.read().splitlines()
+            if source_maps:
+                # The commands carry their lines through the shaking
+                source_map[out_address] = SourceMap.read(out_address +
+                                                         MAP_SUFFIX)
+                source_map[out_address].locate(program[out_address])
+        shaken = shaker.shake(program)
+        for out_address, commands in shaken.items():
+            if commands != program[out_address]:
+                with open(out_address, 'w') as f:
+                    f.write("".join(command + "\n" for command in commands))
+                if source_maps:
+                    shaken_map = SourceMap(
+                        source_map[out_address].jack_address)
+                    shaken_map.add(commands, 1)
+                    shaken_map.write(out_address + MAP_SUFFIX)
+    return shaker
+
+
+def read_manifest(address):
+    """
+    Reads the files to compile from a manifest: one entry per line, or
+    NUL separated entries if there is any NUL in it. An entry is the
+    address of a jack file, optionally followed by a tab and the address
+    of its vm file. Empty entries are skipped.
+    :param address: The address of the manifest, - for the standard input.
+    :return: The addresses of the jack files, and of their vm files, None
+    where not given, in the order of the manifest.
+    """
+    if address == "-":
+        text = sys.stdin.read()
+    else:
+        with open(address, 'r') as f:
+            text = f.read()
+    separator = "\0" if "\0" in text else "\n"
+    files = []
+    vm_addresses = []
+    for entry in text.split(separator):
+        entry = entry.strip("\r\n")
+        if not entry:
+            continue
+        address, _, vm_address = entry.partition("\t")
+        files.append(address)
+        vm_addresses.append(vm_address or None)
+    return files, vm_addresses
+
+
+def status_line(address, vm_address, errors):
+    """
+    :return: The json line reporting the compilation of a file, holding its
+    errors as diagnostic dicts if it failed.
+    """
+    status = {"file": address, "output": vm_address,
+              "status": "ok" if errors is None else "error"}
+    if errors is not None:
+        status["errors"] = errors
+    return json.dumps(status) + "\n"
+
+
+def write_profiles(profiles, address):
+    """
+    Writes profiles as json lines.
+    :param profiles: The Profiles.
+    :param address: The address of the file to write, - for the standard
+    output.
+    """
+    lines = "".join(profile.to_json() + "\n" for profile in profiles)
+    if address == "-":
+        sys.stdout.write(lines)
+    else:
+        with open(address, 'w') as f:
+            f.write(lines)
+
+
+def parse_args(argv):
+    # No abbreviations: the compile server and its client recognize the
+    # long running modes by their full names
+    parser = argparse.ArgumentParser(
+        prog="JackAnalyzer", allow_abbrev=False,
+        description="Compiles .jack files, or directories of them, to vm "
+                    "code.")
+    parser.add_argument("paths", nargs="*",
+                        help="jack files or directories to compile")
+    parser.add_argument("--files-from", metavar="FILE",
+                        help="also compile the files listed in FILE (- for "
+                             "the standard input), one per line or NUL "
+                             "separated, each optionally followed by a tab "
+                             "and the address of its vm file. A json status "
+                             "line is written to the standard output for "
+                             "every file, the report goes to the standard "
+                             "error")
+    parser.add_argument("-j", "--jobs", type=jobs_count, default=1,
+                        help="number of worker processes to compile with, "
+                             "auto for one per CPU (default: 1)")
+    parser.add_argument("-O", "--optimize", action="store_true",
+                        help="run the peephole optimizer and dead code "
+                             "elimination on the vm code, and report what "
+                             "they removed")
+    parser.add_argument("--intern-strings", action="store_true",
+                        help="build each distinct string literal of a class "
+                             "once, into a static variable of its own. The "
+                             "program must not modify or dispose of literal "
+                             "strings")
+    parser.add_argument("--inline-threshold", type=int,
+                        default=DEFAULT_INLINE_THRESHOLD,
+                        help="the most vm commands to spend on multiplying "
+                             "by a constant with additions instead of "
+                             "calling Math.multiply, 0 to only simplify "
+                             "multiplying by 0 and 1 (default: %(default)s)")
+    parser.add_argument("--xml", action="store_true",
+                        help="also write the parse tree of each class as "
+                             "xml next to it, from the same parse")
+    parser.add_argument("--source-map", action="store_true",
+                        help="also write a source map next to each vm "
+                             "file, with a .map suffix, giving the jack "
+                             "line each vm line was generated from")
+    parser.add_argument("--whole-program", action="store_true",
+                        help="treat the files of each directory as one "
+                             "program, and remove the functions no call "
+                             "chain from Sys.init or Main.main reaches")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="write the timings of each phase of compiling "
+                             "each file, and counters of the tokens, parser "
+                             "calls and vm commands, to FILE as json lines "
+                             "(- for the standard output)")
+    parser.add_argument("--profile-dump", metavar="FILE",
+                        help="run the whole compilation under cProfile, in "
+                             "this process, and dump its statistics to FILE "
+                             "for pstats or flame graph tools")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always recompile, without reading or updating "
+                             "the build cache")
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help="directory of the build cache (default: "
+                             "{})".format(CACHE_DIR))
+    parser.add_argument("--cache-size", type=int,
+                        default=DEFAULT_MAX_SIZE // (1024 * 1024),
+                        help="size cap of the build cache in MB, least "
+                             "recently used entries are evicted past it "
+                             "(default: %(default)s)")
+    parser.add_argument("--error-format", choices=("text", "json"),
+                        default="text",
+                        help="how to report errors on the standard error: "
+                             "as file:line:column: message lines, or as "
+                             "json lines with the file, line, column and "
+                             "message of each (default: %(default)s)")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running after the build, and recompile "
+                             "the files that change, or appear in the "
+                             "given directories, after each burst of saves. "
+                             "vm files are replaced at once, and the time "
+                             "of every rebuild is reported")
+    parser.add_argument("--poll", action="store_true",
+                        help="with --watch, poll the modification times "
+                             "and sizes of the files even if inotify is "
+                             "available")
+    parser.add_argument("--serve", action="store_true",
+                        help="keep compiling in this process: serve the "
+                             "requests of JackClient.py on a Unix domain "
+                             "socket until interrupted")
+    parser.add_argument("--socket", metavar="ADDRESS",
+                        help="the address of the socket to serve on, or "
+                             "for JackClient.py to send the command line "
+                             "to (default: ${} or a socket of the user's in "
+                             "the runtime directory)".format(SOCKET_ENV))
+    args = parser.parse_args(argv)
+    if not args.paths and not args.serve and args.files_from is None:
+        parser.error("the following arguments are required: paths")
+    return args
+
+
+def jobs_count(value):
+    """
+    :param value: The value of -j.
+    :return: The number of worker processes it asks for.
+    :raise argparse.ArgumentTypeError: If it is not a positive number or
+    auto.
+    """
+    if value == "auto":
+        return os.cpu_count() or 1
+    try:
+        jobs = int(value)
+    except ValueError:
+        jobs = 0
+    if jobs <= 0:
+        raise argparse.ArgumentTypeError(
+            "expected a positive number or auto, found {}".format(value))
+    return jobs
+
+
+def options_key(args):
+    """
+    :return: A string describing the options that affect the generated
+    code, so that differently compiled outputs are cached apart.
+    """
+    options = "I{}".format(args.inline_threshold)
+    if args.optimize:
+        options += "O" + ",".join(optimization_passes())
+    if args.intern_strings:
+        options += "S"
+    return options
+
+
+def engine_options(args):
+    """
+    :return: The keyword arguments for the CompilationEngine.
+    """
+    return {"intern_strings": args.intern_strings,
+            "inline_threshold": args.inline_threshold,
+            "xml": args.xml,
+            "atomic": args.watch,
+            "source_map": args.source_map}
+
+
+def serve(args):
+    """
+    Serves compile requests until interrupted, see CompileServer.
+    :return: The exit status.
+    """
+    # Not needed by a single compilation
+    from CompileServer import CompileServer
+    server = CompileServer(run, optimization_passes, args.socket)
+    print("serving on {}".format(server.address), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def build_targets(paths, manifest):
+    """
+    :param paths: The files and directories given on the command line.
+    :param manifest: The files and vm addresses read by read_manifest.
+    :return: The addresses of the jack files to compile, and of their vm
+    files as for analyze_files.
+    """
+    files = collect_files(paths)
+    vm_addresses = [None] * len(files)
+    listed, listed_vm_addresses = manifest
+    return files + listed, vm_addresses + listed_vm_addresses
+
+
+def report_file(args):
+    """
+    :return: The file to report on the build in. The standard output is
+    left to the status lines of --files-from.
+    """
+    return sys.stdout if args.files_from is None else sys.stderr
+
+
+def build(args, files, vm_addresses, cache, jobs):
+    """
+    Compiles files, and reports on them, as the command line asks.
+    :param args: The parsed command line.
+    :param files: The addresses of the jack files.
+    :param vm_addresses: The addresses of their vm files, see
+    analyze_files.
+    :param cache: A BuildCache to compile through, if any.
+    :param jobs: The maximal number of worker processes.
+    :return: The (address, errors) pairs of the files that failed, see
+    analyze_files.
+    """
+    report = None
+    if args.files_from is not None:
+        def report(address, vm_address, errors):
+            sys.stdout.write(status_line(address, vm_address, errors))
+    profiler = None
+    if args.profile_dump:
+        # cProfile only sees this process
+        jobs = 1
+        profiler = cProfile.Profile()
+        profiler.enable()
+    errors, stats, profiles = analyze_files(files, jobs, cache,
+                                            args.optimize,
+                                            engine_options(args),
+                                            args.profile is not None,
+                                            vm_addresses, report)
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile_dump)
+    if args.profile is not None:
+        write_profiles(profiles, args.profile)
+    if cache is not None:
+        cache.evict()
+    if args.whole_program:
+        shaker = shake_programs(files, {address for address, _ in errors},
+                                vm_addresses, args.source_map)
+        print("whole program: " + shaker.report(), file=report_file(args))
+    for pass_name, pass_stats in stats.items():
+        for name, removed in pass_stats.items():
+            print("{}: {}: {} commands removed".format(pass_name, name,
+                                                       removed),
+                  file=report_file(args))
+    for address, diagnostics in errors:
+        for diagnostic in diagnostics:
+            if args.error_format == "json":
+                line = json.dumps(dict(diagnostic, file=address))
+            else:
+                line = format_diagnostic(address, diagnostic)
+            print(line, file=sys.stderr)
+    return errors
+
+
+def watch(args, manifest, cache, jobs):
+    """
+    Builds the files, then rebuilds those whose modification time or size
+    changes, and those new to the watched directories, until interrupted.
+    With --whole-program, every program holding a changed file is rebuilt.
+    :param args: The parsed command line.
+    :param manifest: The files and vm addresses read by read_manifest.
+    :param cache: A BuildCache to compile through, if any.
+    :param jobs: The maximal number of worker processes.
+    :return: The exit status.
+    """
+    files, vm_addresses = build_targets(args.paths, manifest)
+    directories = {os.path.dirname(os.path.abspath(address))
+                   for address in files}
+    directories.update(os.path.abspath(path) for path in args.paths
+                       if os.path.isdir(path))
+    watcher = create_watcher(sorted(directories), args.poll)
+    out = report_file(args)
+    # Taken before building, so that no save during the build goes unseen
+    before = snapshot(files)
+    build(args, files, vm_addresses, cache, jobs)
+    print("watching {} files in {} directories".format(
+        len(files), len(directories)), file=out, flush=True)
+    try:
+        while True:
+            if not watcher.wait():
+                continue
+            files, vm_addresses = build_targets(args.paths, manifest)
+            after = snapshot(files)
+            if after == before:
+                continue
+            # A burst of saves is rebuilt once, after it settles
+            while True:
+                time.sleep(DEBOUNCE_DELAY)
+                watcher.wait(0)
+                files, vm_addresses = build_targets(args.paths, manifest)
+                settled = snapshot(files)
+                if settled == after:
+                    break
+                after = settled
+            changed = set(changed_files(before, after))
+            if args.whole_program:
+                programs = {os.path.dirname(os.path.abspath(address))
+                            for address in changed}
+                changed = {address for address in files
+                           if os.path.dirname(os.path.abspath(address))
+                           in programs}
+            rebuilt = [index for index, address in enumerate(files)
+                       if address in changed]
+            before = after
+            if not rebuilt:
+                # Only removed files
+                continue
+            start = time.perf_counter()
+            errors = build(args, [files[index] for index in rebuilt],
+                           [vm_addresses[index] for index in rebuilt],
+                           cache, jobs)
+            print("rebuilt {} of {} files in {:.1f} ms, {} failed".format(
+                len(rebuilt), len(files),
+                (time.perf_counter() - start) * 1000, len(errors)),
+                file=out, flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    return 0
+
+
+def run(argv):
+    """
+    Runs a JackAnalyzer command line.
+    :param argv: The command line arguments.
+    :return: The exit status.
+    """
+    args = parse_args(argv)
+    if args.serve:
+        return serve(args)
+    jobs = args.jobs
+    cache = None
+    # The cache only holds vm files, a hit would not write the xml or the
+    # source map
+    if not args.no_cache and not args.xml and not args.source_map:
+        cache = BuildCache(VERSION, options_key(args), args.cache_dir,
+                           args.cache_size * 1024 * 1024)
+    manifest = ([], [])
+    if args.files_from is not None:
+        manifest = read_manifest(args.files_from)
+    if args.watch:
+        return watch(args, manifest, cache, jobs)
+    errors = build(args, *build_targets(args.paths, manifest), cache, jobs)
+    return 1 if errors else 0
 
 
 def main():
-    # verify input files correctness:
-    for i in range(1, len(sys.argv)):
-        arg = sys.argv[i]
-        if os.path.isdir(arg):
-            analyze_dir(arg)
-        else:
-            analyze_file(arg)
+    status = run(sys.argv[1:])
+    if status:
+        sys.exit(status)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,86 @@
+"""
+The thin client of the compile server: hands its command line to the
+server started with JackAnalyzer --serve if one is listening, and runs
+JackAnalyzer in this process otherwise. Either way the files written, the
+output and the exit status are the same.
+
+    python3 JackClient.py [JackAnalyzer arguments]
+"""
+import io
+import os
+import sys
+from CompileProtocol import connect, send_message, receive_message
+
+
+def reads_stdin(argv):
+    """
+    :return: True if the command line reads the files to compile from the
+    standard input.
+    """
+    for index, arg in enumerate(argv):
+        if arg == "--files-from=-" or \
+                arg == "--files-from" and argv[index + 1:index + 2] == ["-"]:
+            return True
+    return False
+
+
+def socket_option(argv):
+    """
+    :return: The address given with --socket, None if there is none.
+    """
+    address = None
+    for index, arg in enumerate(argv):
+        if arg.startswith("--socket="):
+            address = arg[len("--socket="):]
+        elif arg == "--socket" and index + 1 < len(argv):
+            address = argv[index + 1]
+    return address
+
+
+def forward(argv):
+    """
+    Hands a command line to the server, if one of the user's is listening.
+    :param argv: The command line arguments.
+    :return: The server's response, None if no server answered, in which
+    case the standard input can still be read.
+    """
+    sock = connect(socket_option(argv))
+    if sock is None:
+        return None
+    message = {"argv": argv, "cwd": os.getcwd()}
+    stdin = None
+    # Only read once a server is there to take it
+    if reads_stdin(argv):
+        stdin = sys.stdin.read()
+        message["stdin"] = stdin
+    try:
+        with sock:
+            send_message(sock, message)
+            response = receive_message(sock)
+    except (OSError, ValueError):
+        # The server went away mid request, compiling again is harmless
+        response = None
+    if response is None and stdin is not None:
+        # For the local run to read it again
+        sys.stdin = io.StringIO(stdin)
+    return response
+
+
+def main():
+    argv = sys.argv[1:]
+    # Long running modes stay in this process
+    if "--serve" not in argv and "--watch" not in argv:
+        response = forward(argv)
+        if response is not None:
+            sys.stdout.write(response.get("stdout", ""))
+            sys.stderr.write(response.get("stderr", ""))
+            if "error" in response:
+                print(response["error"], file=sys.stderr)
+            sys.exit(response["status"])
+    # Only loaded without a server, it is most of the startup time
+    import JackAnalyzer
+    sys.exit(JackAnalyzer.run(argv))
+
+
+if __name__ == '__main__':
+    main()
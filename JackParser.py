@@ -0,0 +1,585 @@
+from TokenTypes import KEYWORD_KIND, INT_CONST_KIND, STRING_CONST_KIND
+from TokenTypes import IDENTIFIER_KIND, SYMBOL_KIND
+from JackAST import Class, ClassVarDec, Subroutine, VarDec, Let, If, While
+from JackAST import Do, Return, Expression, IntegerConstant, StringConstant
+from JackAST import KeywordConstant, VarName, ArrayAccess, SubroutineCall
+from JackAST import Parenthesized, UnaryOp
+from JackTokenizer import Token
+from Diagnostics import Diagnostic
+
+
+class _SyntaxError(Exception):
+    """
+    Unwinds the parser to where it recovers from a syntax error, once the
+    error is recorded.
+    """
+
+
+class Parser:
+    """
+    Parses the tokens of a Jack class into its abstract syntax tree, see
+    JackAST. A syntax error does not stop the parser: it is recorded, the
+    tokens up to the next statement or declaration are skipped, and parsing
+    goes on from there, so that a single parse finds all the errors.
+    """
+    _OPEN_PARENTHESIS = "("
+    _CLOSE_PARENTHESIS = ")"
+    _OPEN_BRACKET = "["
+    _CLOSE_BRACKET = "]"
+    _DOT = "."
+    _OPS = frozenset(["+", "-", "*", "/", "&", "|", "<", ">", "="])
+    _UNARY_OPS = frozenset(["-", "~"])
+    _STATEMENTS = frozenset(["let", "if", "while", "do", "return"])
+    _CLASS_VAR_KINDS = frozenset(["static", "field"])
+    _SUBROUTINE_KINDS = frozenset(["constructor", "function", "method"])
+    _VAR_TYPES = frozenset(["int", "char", "boolean"])
+    _RETURN_TYPES = _VAR_TYPES | frozenset(["void"])
+    _MEMBER_KINDS = _CLASS_VAR_KINDS | _SUBROUTINE_KINDS
+    # Where parsing picks up again after a syntax error in a statement
+    _STATEMENT_SYNC = _STATEMENTS | _MEMBER_KINDS | frozenset([";"])
+    # Where parsing picks up again after a syntax error in the declaration
+    # of a subroutine, to parse its body all the same
+    _BODY_SYNC = _MEMBER_KINDS | frozenset(["{"])
+    _KIND_NAMES = {KEYWORD_KIND: "a keyword", SYMBOL_KIND: "a symbol",
+                   INT_CONST_KIND: "an integer constant",
+                   STRING_CONST_KIND: "a string constant",
+                   IDENTIFIER_KIND: "an identifier"}
+
+    def __init__(self, tokenizer):
+        """
+        :param tokenizer: The Tokenizer of the class to parse.
+        """
+        self.tokenizer = tokenizer
+        # The syntax errors found, as Diagnostics in the order of the source
+        self.errors = []
+        self.__last_error = None
+        # Stands for the end of the tokens, which matches no expected token
+        self.__end = Token(SYMBOL_KIND, "", len(tokenizer.source))
+        self.curr_token = tokenizer.get_current_token() \
+            if tokenizer.has_more_tokens() else self.__end
+
+    # ========== Parsing Methods ========== #
+
+    def parse_class(self, visitors=()):
+        """
+        Parses a complete class, see errors for the syntax errors found.
+        :param visitors: Visitors to stream the class to: each declaration
+        and subroutine is handed to all of them as soon as it is parsed,
+        between their start_class and end_class calls, and is not kept in
+        the tree. Nothing more is handed to them after a syntax error, and
+        end_class is not called.
+        :return: The Class node.
+        """
+        name = None
+        try:
+            self.eat("class")
+            name = self.eat_kind(IDENTIFIER_KIND)
+            self.eat("{")
+        except _SyntaxError:
+            self.__synchronize(Parser._MEMBER_KINDS)
+        if self.errors:
+            visitors = ()
+        for visitor in visitors:
+            visitor.start_class(name)
+        var_decs = []
+        while self.peek_any(Parser._CLASS_VAR_KINDS):
+            visitors = self.__member(self.parse_class_var_dec, var_decs,
+                                     visitors)
+        subroutines = []
+        while not self.peek_token("}") and self.curr_token is not self.__end:
+            if self.peek_any(Parser._SUBROUTINE_KINDS):
+                visitors = self.__member(self.parse_subroutine, subroutines,
+                                         visitors)
+                continue
+            try:
+                self.__expected("a subroutine declaration")
+            except _SyntaxError:
+                visitors = ()
+                self.__synchronize(Parser._SUBROUTINE_KINDS, True)
+        try:
+            self.eat("}")
+            if self.curr_token is not self.__end:
+                self.__expected("the end of the file")
+        except _SyntaxError:
+            visitors = ()
+        for visitor in visitors:
+            visitor.end_class()
+        return Class(name, var_decs, subroutines)
+
+    def parse_class_var_dec(self):
+        """
+        Parses a single static or field declaration.
+        :return: The ClassVarDec node.
+        """
+        # (static|field)
+        kind = self.eat_any(Parser._CLASS_VAR_KINDS)
+        # type
+        var_type = self.__parse_type(False)
+        names = self.__var_names()
+        self.eat(";")
+        return ClassVarDec(kind, var_type, names)
+
+    def parse_subroutine(self):
+        """
+        Parses a complete method, function or constructor.
+        :return: The Subroutine node.
+        """
+        start = self.curr_token.start
+        kind = self.eat_any(Parser._SUBROUTINE_KINDS)
+        try:
+            return_type = self.__parse_type(True)
+            # subroutine name
+            name = self.__parse_name()
+            self.eat(Parser._OPEN_PARENTHESIS)
+            parameters = self.parse_parameter_list()
+            self.eat(Parser._CLOSE_PARENTHESIS)
+        except _SyntaxError:
+            self.__synchronize(Parser._BODY_SYNC)
+            if not self.peek_token("{"):
+                raise
+            return_type = name = None
+            parameters = []
+        self.eat("{")
+        var_decs = self.parse_var_decs()
+        statements = self.parse_statements()
+        self.eat("}")
+        return Subroutine(kind, return_type, name, parameters, var_decs,
+                          statements, start)
+
+    def parse_parameter_list(self):
+        """
+        Parses a possibly empty parameter list, not including the
+        enclosing ()
+        :return: The (type, name) pairs of the parameters.
+        """
+        parameters = []
+        if self.__is_type(Parser._VAR_TYPES):
+            parameters.append(self.__parameter())
+            while self.peek_token(","):
+                self.eat(",")
+                parameters.append(self.__parameter())
+        return parameters
+
+    def parse_var_decs(self):
+        """
+        Parses the var declarations of a subroutine.
+        :return: The VarDec nodes.
+        """
+        var_decs = []
+        while self.peek_token("var"):
+            self.eat("var")
+            var_type = self.__parse_type(False)
+            var_decs.append(VarDec(var_type, self.__var_names()))
+            self.eat(";")
+        return var_decs
+
+    def parse_statements(self):
+        """
+        Parses a sequence of statements, not including the enclosing {}
+        :return: The statement nodes.
+        """
+        statements = []
+        keywords = Parser._STATEMENTS
+        while True:
+            statement = self.curr_token.token
+            try:
+                if statement not in keywords:
+                    if statement == "}" or self.curr_token is self.__end or \
+                            statement in Parser._MEMBER_KINDS:
+                        break
+                    self.__expected("a statement")
+                if statement == "let":
+                    statements.append(self.parse_let())
+                elif statement == "if":
+                    statements.append(self.parse_if())
+                elif statement == "while":
+                    statements.append(self.parse_while())
+                elif statement == "do":
+                    statements.append(self.parse_do())
+                else:
+                    statements.append(self.parse_return())
+            except _SyntaxError:
+                self.__synchronize(Parser._STATEMENT_SYNC)
+        return statements
+
+    def parse_do(self):
+        """
+        Parses a do statement
+        """
+        start = self.curr_token.start
+        self.eat("do")
+        call = self.__subroutine_call()
+        self.eat(";")
+        return Do(call, start)
+
+    def parse_let(self):
+        """
+        Parses a let statement
+        """
+        start = self.curr_token.start
+        self.eat("let")
+        name = self.__parse_name()
+        index = None
+        # Determine [expression]
+        if self.peek_token(Parser._OPEN_BRACKET):
+            index = self.__index()
+        self.eat("=")
+        value = self.parse_expression()
+        self.eat(";")
+        return Let(name, index, value, start)
+
+    def parse_while(self):
+        """
+        Parses a while statement.
+        """
+        start = self.curr_token.start
+        self.eat("while")
+        self.eat(Parser._OPEN_PARENTHESIS)
+        condition = self.parse_expression()
+        self.eat(Parser._CLOSE_PARENTHESIS)
+        self.eat("{")
+        statements = self.parse_statements()
+        self.eat("}")
+        return While(condition, statements, start)
+
+    def parse_return(self):
+        """
+        Parses a return statement.
+        """
+        start = self.curr_token.start
+        self.eat("return")
+        value = None
+        # if next is expression:
+        if self.__is_term():
+            value = self.parse_expression()
+        self.eat(";")
+        return Return(value, start)
+
+    def parse_if(self):
+        """
+        Parses an if statement, possibly with a trailing else clause.
+        """
+        start = self.curr_token.start
+        self.eat("if")
+        self.eat(Parser._OPEN_PARENTHESIS)
+        condition = self.parse_expression()
+        self.eat(Parser._CLOSE_PARENTHESIS)
+        self.eat("{")
+        statements = self.parse_statements()
+        self.eat("}")
+        else_statements = None
+        # Handle else:
+        if self.peek_token("else"):
+            self.eat("else")
+            self.eat("{")
+            else_statements = self.parse_statements()
+            self.eat("}")
+        return If(condition, statements, else_statements, start)
+
+    def parse_expression(self):
+        """
+        Parses an expression.
+        :return: The Expression node.
+        """
+        term = self.parse_term()
+        operations = []
+        # Case: term (op term)*
+        while self.peek_any(Parser._OPS):
+            operation = self.eat_any(Parser._OPS)
+            operations.append((operation, self.parse_term()))
+        return Expression(term, operations)
+
+    def parse_term(self):
+        """
+        Parses a term.
+        :return: The node of the term.
+        """
+        curr_type = self.peek_type()
+        # Handle integer constant
+        if curr_type == INT_CONST_KIND:
+            return IntegerConstant(self.__advance_token())
+        # Handle String constant
+        elif curr_type == STRING_CONST_KIND:
+            return StringConstant(self.__advance_token())
+        # Handle Keyword constant
+        elif curr_type == KEYWORD_KIND:
+            return KeywordConstant(self.__advance_token())
+        # Case: token is a varName or a subroutineName
+        elif curr_type == IDENTIFIER_KIND:
+            return self.__identifier()
+        # Case: ( expression )
+        elif self.peek_token(Parser._OPEN_PARENTHESIS):
+            self.eat(Parser._OPEN_PARENTHESIS)
+            expression = self.parse_expression()
+            self.eat(Parser._CLOSE_PARENTHESIS)
+            return Parenthesized(expression)
+        # Case: unaryOp term
+        elif self.peek_any(Parser._UNARY_OPS):
+            op = self.eat_any(Parser._UNARY_OPS)
+            return UnaryOp(op, self.parse_term())
+        self.__expected("a term")
+
+    def parse_expression_list(self):
+        """
+        Parses a possibly empty list of comma separated expressions
+        :return: The Expression nodes.
+        """
+        expressions = []
+        if self.__is_term():
+            expressions.append(self.parse_expression())
+            while self.peek_token(","):
+                self.eat(",")
+                expressions.append(self.parse_expression())
+        return expressions
+
+    # ========== Parsing Helper ========== #
+
+    def __member(self, parse, members, visitors):
+        """
+        Parses a member of the class, and hands it to the visitors, or
+        keeps it in the list of members if there are none. On a syntax
+        error, skips to the next member.
+        :param parse: The method parsing the member.
+        :return: The visitors to hand the next members to, none after a
+        syntax error.
+        """
+        try:
+            node = parse()
+        except _SyntaxError:
+            self.__synchronize(Parser._MEMBER_KINDS)
+            return ()
+        if self.errors:
+            return ()
+        if visitors:
+            for visitor in visitors:
+                node.accept(visitor)
+        else:
+            members.append(node)
+        return visitors
+
+    def __var_names(self):
+        """
+        Parses a comma separated list of variable names.
+        :return: The names.
+        """
+        names = [self.eat_kind(IDENTIFIER_KIND)]
+        while self.peek_token(","):
+            self.eat(",")
+            names.append(self.eat_kind(IDENTIFIER_KIND))
+        return names
+
+    def __parameter(self):
+        """
+        Parses a parameter.
+        :return: The type and the name of the parameter.
+        """
+        var_type = self.__parse_type(False)
+        return var_type, self.eat_kind(IDENTIFIER_KIND)
+
+    def __parse_type(self, for_function):
+        """
+        Parses a type for a function or variable, determined by
+        a received boolean value.
+        :param for_function: True if is type of function, false otherwise.
+        :return: The type.
+        """
+        types = Parser._RETURN_TYPES if for_function else Parser._VAR_TYPES
+        if self.__is_type(types):
+            return self.__advance_token()
+        self.__expected("a type")
+
+    def __is_type(self, types):
+        """
+        :param types: The keywords accepted as a type.
+        :return: True if the current token is a class name or one of the
+        given keywords.
+        """
+        return self.curr_token.kind == IDENTIFIER_KIND or \
+            self.curr_token.token in types
+
+    def __parse_name(self):
+        if self.peek_type() == IDENTIFIER_KIND:
+            return self.__advance_token()
+        self.__expected("an identifier")
+
+    def __identifier(self):
+        """
+        Parses the case of an identifier given as a term
+        """
+        # Case: varName [ expression ]
+        if self.peek_next(Parser._OPEN_BRACKET):
+            name = self.__parse_name()
+            return ArrayAccess(name, self.__index())
+        # Case: subroutineCall:
+        elif self.peek_next(Parser._OPEN_PARENTHESIS) or \
+                self.peek_next(Parser._DOT):
+            return self.__subroutine_call()
+        else:
+            return VarName(self.eat_kind(IDENTIFIER_KIND))
+
+    def __index(self):
+        """
+        Parses [expression]
+        :return: The Expression node.
+        """
+        self.eat(Parser._OPEN_BRACKET)
+        index = self.parse_expression()
+        self.eat(Parser._CLOSE_BRACKET)
+        return index
+
+    def __is_term(self):
+        return self.peek_type() != SYMBOL_KIND or \
+            self.peek_token(Parser._OPEN_PARENTHESIS) or \
+            self.peek_any(Parser._UNARY_OPS)
+
+    def __subroutine_call(self):
+        if self.curr_token.kind != IDENTIFIER_KIND:
+            self.__expected("a subroutine call")
+        receiver = None
+        if self.peek_next(Parser._DOT):
+            receiver = self.eat_kind(IDENTIFIER_KIND)
+            self.eat(Parser._DOT)
+        elif not self.peek_next(Parser._OPEN_PARENTHESIS):
+            self.__advance_token()
+            self.__expected("'(' or '.'")
+        name = self.eat_kind(IDENTIFIER_KIND)
+        self.eat(Parser._OPEN_PARENTHESIS)
+        arguments = self.parse_expression_list()
+        self.eat(Parser._CLOSE_PARENTHESIS)
+        return SubroutineCall(receiver, name, arguments)
+
+    # ========== Error Recovery ========== #
+
+    def __expected(self, expected):
+        """
+        Records a syntax error at the current token, and unwinds to where
+        the parser recovers.
+        :param expected: A description of what should have been there.
+        """
+        if self.curr_token is self.__end:
+            found = "the end of the file"
+        else:
+            found = "'{}'".format(self.curr_token.token)
+        self.__error("expected {}, found {}".format(expected, found))
+        raise _SyntaxError()
+
+    def __error(self, message):
+        """
+        Records a syntax error at the current token, unless one was already
+        recorded there: recovering from an error may run into it again.
+        """
+        offset = self.curr_token.start
+        if offset == self.__last_error:
+            return
+        self.__last_error = offset
+        line, column = self.tokenizer.line_column(offset)
+        self.errors.append(Diagnostic(line, column, message))
+
+    def __synchronize(self, stops, consume_one=False):
+        """
+        Skips tokens after a syntax error, up to one of the given stops, or
+        the } closing the block of the error. Nested blocks are skipped
+        whole. A ; among the stops is skipped too, as the end of what
+        failed.
+        :param stops: The token values to stop at.
+        :param consume_one: True to skip at least one token.
+        """
+        depth = 0
+        if consume_one and self.curr_token is not self.__end:
+            depth = self.__nesting(depth)
+            self.__advance_token()
+        while self.curr_token is not self.__end:
+            token = self.curr_token.token
+            if depth == 0 and self.curr_token.kind != STRING_CONST_KIND:
+                if token == ";" and token in stops:
+                    self.__advance_token()
+                    return
+                if token in stops or token == "}":
+                    return
+            depth = self.__nesting(depth)
+            self.__advance_token()
+
+    def __nesting(self, depth):
+        """
+        :return: The depth of nested blocks after the current token.
+        """
+        if self.curr_token.kind == SYMBOL_KIND:
+            if self.curr_token.token == "{":
+                return depth + 1
+            if self.curr_token.token == "}":
+                return depth - 1
+        return depth
+
+    # ========== Token Handling ========== #
+
+    def eat(self, token):
+        """
+        Handles advancing past terminal tokens.
+        :param token: The exact value of the expected token
+        :return: The value of the token eaten.
+        """
+        if self.curr_token.token == token:
+            return self.__advance_token()
+        self.__expected("'{}'".format(token))
+
+    def eat_any(self, tokens):
+        """
+        Handles advancing past a terminal token out of a set of options.
+        :param tokens: A frozenset of the accepted token values
+        :return: The value of the token eaten.
+        """
+        if self.curr_token.token in tokens:
+            return self.__advance_token()
+        self.__expected("one of {}".format(", ".join(
+            "'{}'".format(token) for token in sorted(tokens))))
+
+    def eat_kind(self, kind):
+        """
+        Handles advancing past a terminal token of a given kind.
+        :param kind: The expected token kind, see TokenTypes
+        :return: The value of the token eaten.
+        """
+        if self.curr_token.kind == kind:
+            return self.__advance_token()
+        self.__expected(Parser._KIND_NAMES[kind])
+
+    def peek_token(self, compare_next):
+        """
+        :param compare_next: The token value to compare.
+        :return: True if the current token has the given value, False
+        otherwise.
+        """
+        return self.curr_token.token == compare_next
+
+    def peek_any(self, tokens):
+        """
+        :param tokens: A frozenset of token values to compare.
+        :return: True if the current token is one of the given values.
+        """
+        return self.curr_token.token in tokens
+
+    def peek_type(self):
+        """
+        :return: the kind of the current token
+        """
+        return self.curr_token.kind
+
+    def peek_next(self, comp):
+        next_token = self.tokenizer.get_next_token()
+        # Case: There actually is a next token
+        if next_token:
+            return next_token.token == comp
+        return False
+
+    def __advance_token(self):
+        """
+        Advances to the next token.
+        :return: The value of the token advanced past.
+        """
+        token = self.curr_token.token
+        self.tokenizer.advance()
+        if self.tokenizer.has_more_tokens():
+            self.curr_token = self.tokenizer.get_current_token()
+        else:
+            self.curr_token = self.__end
+        return token
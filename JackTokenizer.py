@@ -1,44 +1,98 @@
 import re
-from TokenTypes import KEYWORD, SYMBOL, INT_CONST, STRING_CONST, IDENTIFIER
-from TokenTypes import IDENTIFIER_REGEX
+import sys
+from bisect import bisect_left, bisect_right
+from array import array
+from TokenTypes import SYMBOL, INT_CONST, STRING_CONST, IDENTIFIER
+from TokenTypes import KEYWORD_KIND, SYMBOL_KIND, INT_CONST_KIND
+from TokenTypes import STRING_CONST_KIND, IDENTIFIER_KIND, ERROR_KIND
+from TokenTypes import TYPE_NAMES
 
 JACK_SUFFIX = ".jack"
 T_SUFFIX = "T.xml"
+# Tokens are written to the xml file in chunks of this many lines
+XML_CHUNK_SIZE = 4096
+XML_BUFFER_SIZE = 1 << 16
+# The opening and closing tag of each token kind, indexed by kind
+XML_TAGS = tuple(("<{}> ".format(name), " </{}>\n".format(name))
+                 for name in TYPE_NAMES)
+XML_ESCAPES = str.maketrans({"<": "&lt;", ">": "&gt;", "&": "&amp;",
+                             "\"": "&quot;"})
 
 
 class Tokenizer:
-    _KEYWORDS = ["class", "constructor", "function", "method", "field",
-                 "static",
-                 "var", "int", "char", "boolean", "void", "true", "false",
-                 "null", "this", "let", "do", "if", "else", "while", "return"]
-    _SYMBOLS = ["{", "}", "(", ")", "[", "]", ".", ",", ";", "+", "-", "*",
-                "/",
-                "&", "|", "<", ">", "=", "~"]
-    _INT_REGEX = "\d+"
-    _STRING_REG = "\".*\""
-    _KEYWORD_REGEX = "class|constructor|function|method|field|static|var" \
-                     "|int|char|boolean|void|true|false|null|this|let|do" \
-                     "|if|else|while|return"
-    _SYMBOL_REGEX = "{|}|\[|\]|\(|\)|\.|,|;|\+|-|\*|\/|&|\||<|>|=|~"
-
-    _COMMENT_BLOCK_REGEX = r"/\*([^*]|[\r\n]|(\*+([^*/]|[\r\n])))*\*+/"
-    _SINGLE_COMMENT_REGEX = "//.*"
-
-    def __init__(self, address):
-        self.tokens = []
+    _KEYWORDS = frozenset(["class", "constructor", "function", "method",
+                           "field", "static", "var", "int", "char",
+                           "boolean", "void", "true", "false", "null", "this",
+                           "let", "do", "if", "else", "while", "return"])
+    _SYMBOLS = frozenset(["{", "}", "(", ")", "[", "]", ".", ",", ";", "+",
+                          "-", "*", "/", "&", "|", "<", ">", "=", "~"])
+
+    # One pattern for the whole lexical grammar: every match already knows
+    # its type through the name of the group that matched. Whitespace is
+    # skipped by the scanner itself, any other unknown character is an
+    # error token of its own, for the parser to report.
+    _TOKEN_REGEX = re.compile(r"""
+        (?P<comment>/\*.*?\*/|//[^\n]*)
+      | (?P<string>"[^"\n]*")
+      | (?P<int>\d+)
+      | (?P<name>[A-Za-z_]\w*)
+      | (?P<symbol>[{}()\[\].,;+\-*/&|<>=~])
+      | (?P<error>\S)
+    """, re.VERBOSE | re.DOTALL)
+    _NEWLINE_REGEX = re.compile("\n")
+    _GROUP_KINDS = {"string": STRING_CONST_KIND, "int": INT_CONST_KIND,
+                    "symbol": SYMBOL_KIND, "error": ERROR_KIND}
+
+    def __init__(self, address=None, text=None):
+        """
+        :param address: The address of the jack file to tokenize.
+        :param text: The source of the file if it was already read, to
+        tokenize instead of reading the file. Without an address, the
+        tokens cannot be written to an xml file.
+        """
+        # The tokens are stored as parallel arrays: the kind of each token,
+        # and the offsets of its text in the source. Token objects are only
+        # created on demand, as views of the current and next tokens.
+        self.source = ""
+        self.kinds = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
         self.tokenIndex = 0
-        self.int_reg = re.compile(Tokenizer._INT_REGEX)
-        self.str_reg = re.compile(Tokenizer._STRING_REG)
-        self.iden_reg = re.compile(IDENTIFIER_REGEX)
-        self.parse_file(address)
+        # The number of comments skipped, every other match is a token
+        self.comment_count = 0
+        self.__current = None
+        self.__next = None
+        # The offset of the start of each line, built on the first line
+        # lookup, for the source it was built for
+        self.__line_starts = None
+        self.__lines_source = None
+        if text is None:
+            self.parse_file(address)
+        else:
+            self.tokenize(text)
         # self.file_name = os.path.basename(os.path.splitext(address)[0])
-        self.out_address = address.replace(JACK_SUFFIX, T_SUFFIX)
+        self.out_address = None if address is None else \
+            address.replace(JACK_SUFFIX, T_SUFFIX)
+
+    def reset(self):
+        """
+        Moves back to the first token, to parse the tokens again.
+        """
+        self.tokenIndex = 0
+        self.__current = None
+        self.__next = None
 
     def has_more_tokens(self):
         """
         :return: True if there are more tokens, false otherwise.
         """
-        return self.tokenIndex < len(self.tokens)
+        return self.tokenIndex < len(self.kinds)
+
+    def token_count(self):
+        """
+        :return: The number of tokens.
+        """
+        return len(self.kinds)
 
     def advance(self):
         """
@@ -46,42 +100,28 @@ class Tokenizer:
         """
         if self.has_more_tokens():
             self.tokenIndex += 1
+            self.__current = self.__next
+            self.__next = None
 
     def token_type(self):
         """
         :return: The type of the current token
         """
-        return self.tokens[self.tokenIndex].get_type()
-
-    def __determine_type(self, token):
-        """
-        :param token: The token to determine its type.
-        :return: The typ of the token received.
-        """
-        if token in Tokenizer._KEYWORDS:
-            return KEYWORD
-        if token in Tokenizer._SYMBOLS:
-            return SYMBOL
-        if self.int_reg.match(token):
-            return INT_CONST
-        if self.iden_reg.match(token):
-            return IDENTIFIER
-        if self.str_reg.match(token):
-            return STRING_CONST
+        return TYPE_NAMES[self.kinds[self.tokenIndex]]
 
     def keyword(self):
         """
         :return: Returns the token if it is a keyword.
         """
-        if self.tokens[self.tokenIndex] in Tokenizer._KEYWORDS:
-            return self.tokens[self.tokenIndex]
+        if self.kinds[self.tokenIndex] == KEYWORD_KIND:
+            return self.get_current_token()
 
     def symbol(self):
         """
         :return: Returns the token if it is a symbol.
         """
         if self.token_type() == SYMBOL:
-            return self.tokens[self.tokenIndex]
+            return self.get_current_token()
 
     def identifier(self):
         """
@@ -89,7 +129,7 @@ class Tokenizer:
         """
 
         if self.token_type() == IDENTIFIER:
-            return self.tokens[self.tokenIndex]
+            return self.get_current_token()
 
     def int_val(self):
         """
@@ -97,91 +137,353 @@ class Tokenizer:
         """
 
         if self.token_type() == INT_CONST:
-            return self.tokens[self.tokenIndex]
+            return self.get_current_token()
 
     def string_val(self):
         """
         :return: Returns the token if it is a string constant
         """
         if self.token_type() == STRING_CONST:
-            return self.tokens[self.tokenIndex]
+            return self.get_current_token()
 
     def parse_file(self, address):
         """
-        Parses the commands of a given file, removing spaces and comments, and
-        returns a list of the commands parsed and split.
+        Reads a jack file and splits it to tokens, removing spaces and
+        comments.
 
-        :param address: the address of the vm file to read
-        :return: a list of all commands in the file
+        :param address: the address of the jack file to read
         """
         with open(address, "r") as f:
-            # Get all lines ignoring whitespace lines or comment lines:
-            clean_text = f.read()
-            clean_regex = r"({}|{}|\b)".format(Tokenizer._COMMENT_BLOCK_REGEX,
-                                               Tokenizer._SINGLE_COMMENT_REGEX)
-            clean_text = re.sub(clean_regex, '',
-                                clean_text)
-            all_regex = "({}|{}|{}|{}|{})".format(Tokenizer._INT_REGEX,
-                                                  Tokenizer._STRING_REG,
-                                                  IDENTIFIER_REGEX,
-                                                  Tokenizer._KEYWORD_REGEX,
-                                                  Tokenizer._SYMBOL_REGEX)
-            for element in re.finditer(all_regex, clean_text):
-                token = element.group(0)
-                token_type = self.__determine_type(token)
-                self.tokens.append(Token(token_type, token))
+            self.tokenize(f.read())
+
+    def tokenize(self, text):
+        """
+        Splits the given source text to tokens, removing spaces and comments.
+        :param text: The source text
+        """
+        self.source = text
+        keywords = Tokenizer._KEYWORDS
+        group_kinds = Tokenizer._GROUP_KINDS
+        add_kind = self.kinds.append
+        add_start = self.starts.append
+        add_end = self.ends.append
+        for match in Tokenizer._TOKEN_REGEX.finditer(text):
+            group = match.lastgroup
+            if group == "comment":
+                self.comment_count += 1
+                continue
+            if group == "name":
+                kind = KEYWORD_KIND if match.group() in keywords \
+                    else IDENTIFIER_KIND
+            else:
+                kind = group_kinds[group]
+            start, end = match.span()
+            add_kind(kind)
+            add_start(start)
+            add_end(end)
+
+    def token_at(self, index):
+        """
+        :param index: The index of a token.
+        :return: A Token view of the token at the given index.
+        """
+        start = self.starts[index]
+        return Token(self.kinds[index], self.source[start:self.ends[index]],
+                     start)
+
+    def line_of(self, offset):
+        """
+        :param offset: An offset in the source.
+        :return: The line of the offset, counted from 1.
+        """
+        return bisect_right(self.__lines(), offset)
+
+    def token_line(self, index):
+        """
+        :param index: The index of a token.
+        :return: The line the token starts at, counted from 1.
+        """
+        return self.line_of(self.starts[index])
+
+    def line_column(self, offset):
+        """
+        :param offset: An offset in the source.
+        :return: The line and the column of the offset, counted from 1.
+        """
+        line_starts = self.__lines()
+        line = bisect_right(line_starts, offset)
+        return line, offset - line_starts[line - 1] + 1
+
+    def __lines(self):
+        """
+        :return: The offset of the start of each line of the source, in
+        order. Built once per source, lines are only needed for the few
+        tokens reported or mapped, not for every token.
+        """
+        if self.__lines_source is not self.source:
+            self.__line_starts = array('I', [0])
+            self.__line_starts.extend(
+                match.end() for match in
+                Tokenizer._NEWLINE_REGEX.finditer(self.source))
+            self.__lines_source = self.source
+        return self.__line_starts
 
     def get_current_token(self):
         """
         :return: Returns the current token.
         """
-        return self.tokens[self.tokenIndex]
+        if self.__current is None:
+            self.__current = self.token_at(self.tokenIndex)
+        return self.__current
 
     def get_next_token(self):
         """
         :return: The next token if there is one.
         """
-        if self.tokenIndex + 1 < len(self.tokens):
-            return self.tokens[self.tokenIndex + 1]
+        if self.__next is None and self.tokenIndex + 1 < len(self.kinds):
+            self.__next = self.token_at(self.tokenIndex + 1)
+        return self.__next
 
     def write_file(self):
         """
-        Writes the tokens to an xml file.
+        Writes the tokens to an xml file, one token per line. The lines are
+        streamed to the file in chunks, so the memory used does not grow with
+        the number of tokens.
         """
-        output = "<tokens>\n"
-        while self.has_more_tokens():
-            output += self.tokens[self.tokenIndex].get_xml_wrap()
-            self.advance()
-        output += "</tokens>"
-        self.tokenIndex = 0
-        with open(self.out_address, 'w') as f:
-            f.write(output)
+        with open(self.out_address, 'w', buffering=XML_BUFFER_SIZE) as f:
+            f.write("<tokens>\n")
+            chunk = []
+            source = self.source
+            for kind, start, end in zip(self.kinds, self.starts, self.ends):
+                if kind == STRING_CONST_KIND:
+                    # Without the ""
+                    start += 1
+                    end -= 1
+                open_tag, close_tag = XML_TAGS[kind]
+                chunk.append(open_tag)
+                chunk.append(source[start:end].translate(XML_ESCAPES))
+                chunk.append(close_tag)
+                if len(chunk) >= XML_CHUNK_SIZE:
+                    f.write("".join(chunk))
+                    chunk = []
+            chunk.append("</tokens>\n")
+            f.write("".join(chunk))
+
+
+class IncrementalTokenizer(Tokenizer):
+    """
+    A Tokenizer of a source being edited, for editors re-checking a file on
+    every keystroke. An edit re-lexes the source from the last token before
+    the line of the edit, until the new tokens fall back in step with the
+    old ones, and keeps all other tokens.
+
+    Offsets after the last edit are kept lazily: the tokens from index
+    __gap on are stored off by __shift, like the text after the gap of a
+    gap buffer. An edit only moves the gap across the tokens between it
+    and the previous edit, so typing in one place never touches the rest
+    of the tokens. The gap is closed before the tokens are used.
+    """
+    # The start of a block comment. A "/" symbol followed by "*" means a
+    # block comment that never ends, so every later "*/" is new text
+    _COMMENT_START = re.compile(r"/\*")
+
+    def __init__(self, address=None, text=None):
+        """
+        See Tokenizer. The comment count is that of the original source,
+        edits do not update it.
+        """
+        super().__init__(address, text)
+        # Signed, since offsets before the gap may be stored negative
+        self.starts = array('i', self.starts)
+        self.ends = array('i', self.ends)
+        self.__gap = len(self.kinds)
+        self.__shift = 0
+
+    def apply_edit(self, offset, deleted, inserted):
+        """
+        Replaces a range of the source, and re-lexes what it affects.
+        :param offset: The offset of the edit in the source.
+        :param deleted: The number of characters removed at the offset.
+        :param inserted: The text inserted at the offset.
+        :return: The index of the first re-lexed token, and the index after
+        the last replaced token before and after the edit.
+        """
+        source = self.source
+        if offset < 0 or deleted < 0 or offset + deleted > len(source):
+            raise ValueError("edit of {} characters at {} is outside the "
+                             "source of {}".format(deleted, offset,
+                                                   len(source)))
+        delta = len(inserted) - deleted
+        new_source = source[:offset] + inserted + source[offset + deleted:]
+        edit_end = offset + len(inserted)
+        # A token ending before the line of the edit did not look at it:
+        # identifiers and numbers look one character ahead, and a " looks
+        # up to the end of its line for the closing one, becoming a string
+        # or, unterminated, an error token of its own
+        line_start = source.rfind("\n", 0, offset) + 1
+        first = self.__bisect(self.ends, line_start)
+        if "*/" in new_source[max(offset - 1, 0):edit_end + 1]:
+            # May close a block comment that was left open before
+            opened = self.__unclosed_comment(line_start)
+            if opened is not None and opened < first:
+                first = opened
+        position = self.__offset(self.ends, first - 1) if first else 0
+        kinds = array('B')
+        starts = array('i')
+        ends = array('i')
+        old_starts = self.starts
+        old_count = len(self.kinds)
+        # The first old token after the edit, the earliest to be back in
+        # step with
+        last = max(first, self.__bisect(old_starts, offset + deleted))
+        keywords = Tokenizer._KEYWORDS
+        group_kinds = Tokenizer._GROUP_KINDS
+        for match in Tokenizer._TOKEN_REGEX.finditer(new_source, position):
+            group = match.lastgroup
+            if group == "comment":
+                continue
+            start, end = match.span()
+            if start >= edit_end:
+                # Back in step once a token starts where an old one did:
+                # the text from there on is the same, and so are the tokens
+                while last < old_count and \
+                        self.__offset(old_starts, last) + delta < start:
+                    last += 1
+                if last < old_count and \
+                        self.__offset(old_starts, last) + delta == start:
+                    break
+            if group == "name":
+                kind = KEYWORD_KIND if match.group() in keywords \
+                    else IDENTIFIER_KIND
+            else:
+                kind = group_kinds[group]
+            kinds.append(kind)
+            starts.append(start)
+            ends.append(end)
+        else:
+            last = old_count
+        self.__replace(first, last, kinds, starts, ends, delta)
+        self.source = new_source
+        self.reset()
+        return first, last, first + len(kinds)
+
+    def __replace(self, first, last, kinds, starts, ends, delta):
+        """
+        Replaces the tokens from first to last with new ones, and moves the
+        gap to after them.
+        :param delta: The change in length of the source.
+        """
+        gap = self.__gap
+        shift = self.__shift
+        old_starts = self.starts
+        old_ends = self.ends
+        # Close the gap up to the replaced tokens, or open it back to the
+        # tokens after them, whichever way it has to move
+        if shift and gap < first:
+            self.__move(gap, first, shift)
+        elif shift and last < gap:
+            self.__move(last, gap, -shift)
+        self.kinds[first:last] = kinds
+        old_starts[first:last] = starts
+        old_ends[first:last] = ends
+        self.__gap = first + len(kinds)
+        self.__shift = shift + delta
+
+    def __move(self, start, end, amount):
+        """
+        Adds an amount to the offsets of the tokens from start to end.
+        """
+        add = amount.__add__
+        for offsets in (self.starts, self.ends):
+            offsets[start:end] = array('i', map(add, offsets[start:end]))
+
+    def __offset(self, offsets, index):
+        """
+        :return: The actual offset of a token, from starts or ends.
+        """
+        if index >= self.__gap:
+            return offsets[index] + self.__shift
+        return offsets[index]
+
+    def __bisect(self, offsets, position):
+        """
+        :param offsets: The starts or the ends of the tokens.
+        :param position: An offset in the source.
+        :return: The number of tokens whose offset is below the position.
+        """
+        gap = self.__gap
+        if gap == len(offsets) or self.__shift == 0:
+            return bisect_left(offsets, position)
+        if gap == 0 or offsets[gap - 1] >= position:
+            return bisect_left(offsets, position, 0, gap)
+        return bisect_left(offsets, position - self.__shift, gap)
+
+    def __unclosed_comment(self, end):
+        """
+        :param end: The offset to look before.
+        :return: The index of the first "/" token before the offset that
+        starts a block comment without an end, None if there is none.
+        """
+        for match in self._COMMENT_START.finditer(self.source, 0, end):
+            index = self.__bisect(self.starts, match.start())
+            if index < len(self.kinds) and \
+                    self.__offset(self.starts, index) == match.start():
+                return index
+        return None
+
+    def settle(self):
+        """
+        Closes the gap, so that starts and ends hold the actual offsets of
+        all tokens.
+        """
+        if self.__shift:
+            self.__move(self.__gap, len(self.kinds), self.__shift)
+        self.__gap = len(self.kinds)
+        self.__shift = 0
+
+    def token_at(self, index):
+        if self.__shift:
+            self.settle()
+        return super().token_at(index)
+
+    def token_line(self, index):
+        if self.__shift:
+            self.settle()
+        return super().token_line(index)
+
+    def write_file(self):
+        self.settle()
+        super().write_file()
 
 
 class Token:
-    def __init__(self, token_type, token):
-        self.token = token
-        self.token_type = token_type
-        if self.token_type == STRING_CONST:
+    __slots__ = ("kind", "token", "start")
+
+    def __init__(self, kind, token, start=0):
+        """
+        :param kind: The integer kind of the token, see TokenTypes.
+        :param token: The text of the token.
+        :param start: The offset of the token in its source.
+        """
+        if kind == STRING_CONST_KIND:
             # Get rid of the ""
-            self.token = self.token[1:-1]
+            token = token[1:-1]
+        # Interned so that value checks against the parser's constants are
+        # mostly identity checks
+        self.token = sys.intern(token)
+        self.kind = kind
+        self.start = start
 
     def get_token(self):
         return self.token
 
+    def get_kind(self):
+        return self.kind
+
     def get_type(self):
-        return self.token_type
+        return TYPE_NAMES[self.kind]
 
     def get_xml_wrap(self):
-        if self.token == "<":
-            tok = "&lt;"
-        elif self.token == ">":
-            tok = "&gt;"
-        elif self.token == "&":
-            tok = "&amp;"
-        elif self.token == "\"":
-            tok = "&quot;"
-        else:
-            tok = self.token
-        return "<{}> {} </{}>".format(self.token_type, tok,
-                                      self.token_type)
+        open_tag, close_tag = XML_TAGS[self.kind]
+        # Without the trailing newline
+        return open_tag + self.token.translate(XML_ESCAPES) + close_tag[:-1]
@@ -0,0 +1,174 @@
+import re
+from SourceMap import keep_line
+
+# Segments that a push can read from without side effects, and without
+# depending on pointer 1 (the that segment)
+_SIMPLE_SEGMENTS = frozenset(["constant", "local", "argument", "static",
+                              "this"])
+# Commands that push a boolean, 0 or -1, unlike any other computed value
+_COMPARISONS = frozenset(["eq", "lt", "gt"])
+_PLACEHOLDER = re.compile(r"\{(\d)\}")
+
+
+def _simple_push(operands):
+    return operands[0] in _SIMPLE_SEGMENTS
+
+
+def _comparison(operands):
+    return operands[2] in _COMPARISONS
+
+
+class PeepholeOptimizer:
+    """
+    Rewrites short windows of vm commands into cheaper equivalents. Each rule
+    is a window of commands, where {n} stands for any single word and must
+    bind the same word wherever it appears, the commands replacing it, and
+    optionally a condition on the bound words.
+    """
+    RULES = (
+        ("double not", ("not", "not"), ()),
+        ("double neg", ("neg", "neg"), ()),
+        ("add zero", ("push constant 0", "add"), ()),
+        ("subtract zero", ("push constant 0", "sub"), ()),
+        ("or zero", ("push constant 0", "or"), ()),
+        # while (true) and if (true) conditions
+        ("always jump", ("push constant 0", "not", "if-goto {0}"),
+         ("goto {0}",)),
+        # while (false) and if (false) conditions
+        ("never jump", ("push constant 0", "if-goto {0}"), ()),
+        ("jump to next", ("goto {0}", "label {0}"), ("label {0}",)),
+        # The if scaffolding: jumping over a goto is a negated jump. if-goto
+        # jumps on any value but 0, and not only negates 0 and -1 into each
+        # other, so the condition must be a comparison, or its negation
+        ("branch over goto", ("{2}", "if-goto {0}", "goto {1}", "label {0}"),
+         ("{2}", "not", "if-goto {1}", "label {0}"), _comparison),
+        ("branch over goto negated", ("{2}", "not", "if-goto {0}",
+                                      "goto {1}", "label {0}"),
+         ("{2}", "if-goto {1}", "label {0}"), _comparison),
+        # The compiler only uses temp 0 as scratch space, it never reads it
+        # back after the command that follows its pop
+        ("scratch round trip", ("pop temp 0", "push temp 0"), ()),
+        # let a[i] = simple: no need to save the value in temp 0 while
+        # pointer 1 is set, when pushing it does not depend on pointer 1
+        ("array store", ("push {0} {1}", "pop temp 0", "pop pointer 1",
+                         "push temp 0", "pop that 0"),
+         ("pop pointer 1", "push {0} {1}", "pop that 0"), _simple_push),
+    )
+    UNUSED_LABEL = "unused label"
+
+    def __init__(self, rules=RULES):
+        """
+        :param rules: The rule table, see RULES.
+        """
+        self.stats = {rule[0]: 0 for rule in rules}
+        self.stats[PeepholeOptimizer.UNUSED_LABEL] = 0
+        # Rules by the opcode of the last command of their window
+        self.__rules = {}
+        for rule in rules:
+            name, window, replacement = rule[:3]
+            condition = rule[3] if len(rule) > 3 else None
+            window = tuple(self.__parse(command) for command in window)
+            self.__rules.setdefault(window[-1][0], []).append(
+                (name, window, replacement, condition))
+
+    def run(self, commands):
+        """
+        Optimizes a list of commands.
+        :param commands: The commands of one or more whole functions.
+        :return: The optimized list of commands.
+        """
+        out = []
+        rules = self.__rules
+        # Commands still to be read, last one first. The replacement of a
+        # rewrite is pushed back here, so that rewrites can cascade.
+        pending = commands[::-1]
+        while pending:
+            command = pending.pop()
+            out.append(command)
+            candidates = rules.get(command.split(" ", 1)[0])
+            if candidates is not None:
+                self.__rewrite(out, pending, candidates)
+        return self.__remove_unused_labels(out)
+
+    def __rewrite(self, out, pending, candidates):
+        """
+        Applies the first rule matching the end of out, and pushes its
+        replacement back to pending.
+        """
+        for name, window, replacement, condition in candidates:
+            size = len(window)
+            if size > len(out):
+                continue
+            operands = self.__match(out[-size:], window)
+            if operands is None or \
+                    (condition is not None and not condition(operands)):
+                continue
+            replaced = out[-size]
+            del out[-size:]
+            pending.extend(command.format(*operands)
+                           for command in reversed(replacement))
+            if pending:
+                # The next command takes the place of the window's first
+                pending[-1] = keep_line(replaced, pending[-1])
+            self.stats[name] += size - len(replacement)
+            return
+
+    @staticmethod
+    def __match(commands, window):
+        """
+        :return: The words bound by the placeholders of the window, in order,
+        or None if the commands do not match it.
+        """
+        operands = {}
+        for command, pattern in zip(commands, window):
+            words = command.split()
+            if len(words) != len(pattern):
+                return None
+            for word, expected in zip(words, pattern):
+                if isinstance(expected, int):
+                    if operands.setdefault(expected, word) != word:
+                        return None
+                elif word != expected:
+                    return None
+        return [operands[n] for n in sorted(operands)]
+
+    @staticmethod
+    def __parse(command):
+        """
+        :return: The words of a window command, with placeholders replaced
+        by their numbers.
+        """
+        words = []
+        for word in command.split():
+            placeholder = _PLACEHOLDER.fullmatch(word)
+            words.append(int(placeholder.group(1)) if placeholder else word)
+        return tuple(words)
+
+    def __remove_unused_labels(self, commands):
+        """
+        Removes the labels no goto or if-goto refers to.
+        """
+        used = set()
+        for command in commands:
+            if command.startswith("goto ") or command.startswith("if-goto "):
+                used.add(command.split(" ", 1)[1])
+        out = []
+        replaced = None
+        for command in commands:
+            if command.startswith("label ") and command[6:] not in used:
+                replaced = keep_line(replaced, command)
+                continue
+            if replaced is not None:
+                command = keep_line(replaced, command)
+                replaced = None
+            out.append(command)
+        self.stats[PeepholeOptimizer.UNUSED_LABEL] += \
+            len(commands) - len(out)
+        return out
+
+    def report(self):
+        """
+        :return: Lines describing how many commands each rule removed.
+        """
+        return ["{}: {} commands removed".format(name, removed)
+                for name, removed in self.stats.items()]
@@ -0,0 +1,78 @@
+import json
+import time
+from contextlib import contextmanager
+
+# The phases of compiling a file, in order. The vm code is generated, and
+# the xml serialized, while parsing.
+PHASES = ("read", "tokenize", "parse", "write")
+# The parser methods whose calls are counted
+PARSER_METHODS = ("eat", "eat_any", "eat_kind", "peek_token", "peek_any",
+                  "peek_next")
+
+
+class Profile:
+    """
+    The timings and counters of compiling a single file. Nothing is measured
+    unless a Profile is handed to the CompilationEngine, and the counted
+    methods are only wrapped on the instances being profiled, so the
+    compiler pays nothing for it otherwise.
+    """
+
+    def __init__(self, address):
+        """
+        :param address: The address of the profiled jack file.
+        """
+        self.address = address
+        self.cached = False
+        # Wall and cpu seconds of each phase that ran, by its name
+        self.wall = {}
+        self.cpu = {}
+        self.counters = {}
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Measures the code run in the with block as the given phase.
+        :param name: The name of the phase, see PHASES.
+        """
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            self.wall[name] = self.wall.get(name, 0) + \
+                time.perf_counter() - wall
+            self.cpu[name] = self.cpu.get(name, 0) + \
+                time.process_time() - cpu
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def instrument(self, obj, names):
+        """
+        Counts the calls of the given methods of an object, under their
+        names, by shadowing them with counting wrappers on the instance.
+        :param obj: The object.
+        :param names: The names of the methods.
+        """
+        counters = self.counters
+        for name in names:
+            counters.setdefault(name, 0)
+            setattr(obj, name, self.__counted(getattr(obj, name), name,
+                                              counters))
+
+    @staticmethod
+    def __counted(method, name, counters):
+        def counted(*args):
+            counters[name] += 1
+            return method(*args)
+
+        return counted
+
+    def to_json(self):
+        """
+        :return: The profile as a single line of json.
+        """
+        return json.dumps({"file": self.address, "cached": self.cached,
+                           "wall": self.wall, "cpu": self.cpu,
+                           "counters": self.counters})
@@ -0,0 +1,123 @@
+"""
+Source maps from vm code back to the jack lines it was generated from, as
+JackAnalyzer --source-map writes them next to each vm file, with a .map
+suffix added to the vm file's name (Main.vm.map). A map is a text file: its
+first line is the address of the jack file, relative to the map's
+directory, and every other line starts a run of vm lines generated from
+the same jack line,
+    VM_LINE JACK_LINE
+both counted from 1. A run lasts until the next one starts, so that a map
+has a line per jack statement rather than per vm command.
+"""
+from array import array
+from bisect import bisect_right
+
+MAP_SUFFIX = ".map"
+
+
+class SourceLine(str):
+    """
+    A vm command that starts the code of a jack line. The optimization
+    passes keep the command objects they do not rewrite, and with them
+    their line. A command they rewrite or remove hands its line over to
+    the command taking its place, see keep_line.
+    """
+
+    def __new__(cls, command, line):
+        """
+        :param command: The vm command.
+        :param line: The jack line, counted from 1.
+        """
+        command = super().__new__(cls, command)
+        command.line = line
+        return command
+
+
+def keep_line(replaced, command):
+    """
+    For the passes, to keep the jack line of a command they remove or
+    rewrite on the command that takes its place.
+    :param replaced: The command removed.
+    :param command: The command taking its place.
+    :return: The command, a SourceLine of the replaced command's line if
+    that has one and the command has none.
+    """
+    if type(replaced) is SourceLine and type(command) is not SourceLine:
+        return SourceLine(command, replaced.line)
+    return command
+
+
+class SourceMap:
+    """
+    The jack line of each vm line of a file, as runs of vm lines.
+    """
+
+    def __init__(self, jack_address):
+        """
+        :param jack_address: The address of the jack file, as written to
+        the map.
+        """
+        self.jack_address = jack_address
+        # The first vm line of each run, and its jack line
+        self.vm_lines = array('I')
+        self.jack_lines = array('I')
+
+    def add(self, commands, first_line):
+        """
+        Maps the next commands of the vm file.
+        :param commands: The commands, as written to the file. The
+        SourceLines among them start the runs.
+        :param first_line: The vm line of the first command, counted from 1.
+        """
+        jack_lines = self.jack_lines
+        for index, command in enumerate(commands):
+            if type(command) is SourceLine and \
+                    (not jack_lines or jack_lines[-1] != command.line):
+                self.vm_lines.append(first_line + index)
+                jack_lines.append(command.line)
+
+    def locate(self, commands):
+        """
+        Makes the first command of each run a SourceLine, the other way
+        around from add, to map the commands again once some were removed.
+        :param commands: All the commands of the vm file, replaced in place.
+        """
+        for vm_line, jack_line in zip(self.vm_lines, self.jack_lines):
+            commands[vm_line - 1] = SourceLine(commands[vm_line - 1],
+                                               jack_line)
+
+    def jack_line(self, vm_line):
+        """
+        :param vm_line: A line of the vm file, counted from 1.
+        :return: The jack line it was generated from, None if the map does
+        not cover it.
+        """
+        run = bisect_right(self.vm_lines, vm_line) - 1
+        if run < 0:
+            return None
+        return self.jack_lines[run]
+
+    def write(self, address):
+        """
+        :param address: The address of the map file to write.
+        """
+        with open(address, 'w') as map_file:
+            map_file.write(self.jack_address + "\n")
+            map_file.writelines("{} {}\n".format(vm_line, jack_line)
+                                for vm_line, jack_line in
+                                zip(self.vm_lines, self.jack_lines))
+
+    @staticmethod
+    def read(address):
+        """
+        :param address: The address of a map file.
+        :return: The SourceMap it holds.
+        :raise ValueError: If the file is not a source map.
+        """
+        with open(address, 'r') as map_file:
+            source_map = SourceMap(map_file.readline().rstrip("\n"))
+            for line in map_file:
+                vm_line, jack_line = line.split()
+                source_map.vm_lines.append(int(vm_line))
+                source_map.jack_lines.append(int(jack_line))
+        return source_map
@@ -6,5 +6,16 @@ INT_CONST = "integerConstant"
 STRING_CONST = "stringConstant"
 # A sequence of letters not starting with a digit
 IDENTIFIER = "identifier"
+# A character that starts no token, such as a " without its closing "
+ERROR = "error"
 # Regex for identifiers
 IDENTIFIER_REGEX = "[A-Za-z_]\w*"
+
+# Integer kinds of the token types, each one indexes its name in TYPE_NAMES
+KEYWORD_KIND = 0
+SYMBOL_KIND = 1
+INT_CONST_KIND = 2
+STRING_CONST_KIND = 3
+IDENTIFIER_KIND = 4
+ERROR_KIND = 5
+TYPE_NAMES = (KEYWORD, SYMBOL, INT_CONST, STRING_CONST, IDENTIFIER, ERROR)
@@ -0,0 +1,117 @@
+_FUNCTION = "function "
+_CALL = "call "
+_COMMENT = "//"
+# Where execution starts: the bootstrap code calls Sys.init, which calls
+# Main.main when Sys comes from the OS rather than the program
+ENTRY_POINTS = ("Sys.init", "Main.main")
+# The classes of the OS. A program may bring its own, whose functions the
+# OS calls without any call command in the program: Sys.init calls the init
+# function of the others, and the OS uses String, Array and Memory itself.
+# All their functions are kept.
+OS_CLASSES = frozenset(["Array", "Keyboard", "Math", "Memory", "Output",
+                        "Screen", "String", "Sys"])
+
+
+class TreeShaker:
+    """
+    Removes the functions of a whole program that no call chain from its
+    entry points reaches. Jack has no function pointers, so the call
+    commands give the complete call graph, besides the calls made by the OS
+    (see OS_CLASSES).
+    """
+
+    def __init__(self, entry_points=ENTRY_POINTS, kept_classes=OS_CLASSES):
+        """
+        :param entry_points: The names of the functions execution starts
+        from.
+        :param kept_classes: The names of the classes whose functions are
+        all reachable, as if they were entry points.
+        """
+        self.entry_points = entry_points
+        self.kept_classes = kept_classes
+        self.total_functions = 0
+        self.removed_functions = 0
+        self.removed_commands = 0
+        self.removed_bytes = 0
+
+    def shake(self, program):
+        """
+        :param program: The vm code of every class of a program, as lists
+        of commands by the address of their vm file.
+        :return: The vm code of the classes without the unreachable
+        functions, in the same form. A program without any entry point is
+        returned as is.
+        """
+        blocks = {address: self.__split(commands)
+                  for address, commands in program.items()}
+        calls = {}
+        for address_blocks in blocks.values():
+            for name, commands in address_blocks:
+                if name is not None:
+                    calls[name] = [command.split()[1] for command in commands
+                                   if command.startswith(_CALL)]
+        if not any(name in calls for name in self.entry_points):
+            # Not a whole program, but a library
+            return program
+        reachable = self.__reachable(calls)
+        self.total_functions += len(calls)
+        shaken = {}
+        for address, address_blocks in blocks.items():
+            kept = []
+            for name, commands in address_blocks:
+                if name is None or name in reachable:
+                    kept.extend(commands)
+                    continue
+                # Keep the comments, like the string literal tables
+                comments = [command for command in commands
+                            if command.startswith(_COMMENT)]
+                kept.extend(comments)
+                self.removed_functions += 1
+                self.removed_commands += len(commands) - len(comments)
+                self.removed_bytes += sum(len(command) + 1
+                                          for command in commands
+                                          if not command.startswith(_COMMENT))
+            shaken[address] = kept
+        return shaken
+
+    @staticmethod
+    def __split(commands):
+        """
+        :return: The commands split to (function name, commands) blocks. A
+        block of commands before any function has no name.
+        """
+        blocks = []
+        for command in commands:
+            if command.startswith(_FUNCTION):
+                blocks.append((command.split()[1], []))
+            elif not blocks:
+                blocks.append((None, []))
+            blocks[-1][1].append(command)
+        return blocks
+
+    def __reachable(self, calls):
+        """
+        :param calls: The names of the functions each function calls.
+        :return: The set of function names reachable from the entry points
+        and the functions of the kept classes.
+        """
+        reachable = set()
+        pending = [name for name in self.entry_points if name in calls]
+        pending.extend(name for name in calls
+                       if name.split(".", 1)[0] in self.kept_classes)
+        while pending:
+            name = pending.pop()
+            if name in reachable:
+                continue
+            reachable.add(name)
+            pending.extend(callee for callee in calls[name]
+                           if callee in calls and callee not in reachable)
+        return reachable
+
+    def report(self):
+        """
+        :return: A line summarizing the code removed.
+        """
+        return "removed {} of {} functions, {} commands ({} bytes)".format(
+            self.removed_functions, self.total_functions,
+            self.removed_commands, self.removed_bytes)
@@ -0,0 +1,506 @@
+from SymbolTable import SymbolTable
+from ConstantFolder import fold_unary, fold_binary, MAX_INT, TRUE, FALSE
+
+CONSTANT = "constant"
+# The most commands spent on multiplying by a constant with additions before
+# calling Math.multiply instead
+DEFAULT_INLINE_THRESHOLD = 16
+# Segments a single push can be repeated from, to get the same value again
+_REPEATABLE_SEGMENTS = frozenset(["local", "argument", "static", "this",
+                                  "that"])
+
+
+class VMGenerator:
+    """
+    Generates the vm code of a class from its abstract syntax tree, see
+    JackAST. Constant sub-expressions are folded into a single constant, and
+    multiplications and divisions by a constant are strength reduced where
+    it pays off.
+    """
+
+    def __init__(self, vm_writer, intern_strings=False,
+                 inline_threshold=DEFAULT_INLINE_THRESHOLD):
+        """
+        :param vm_writer: The VMWriter to write the code with.
+        :param intern_strings: True to build each distinct string literal
+        of the class once, into a static variable of its own, instead of
+        every time it is evaluated.
+        :param inline_threshold: The most commands to spend on multiplying
+        by a constant inline, see __reduce_multiplication.
+        """
+        self.vm_writer = vm_writer
+        self.symbol_table = SymbolTable()
+        self.label_count = -1
+        self.class_name = ""
+        self.intern_strings = intern_strings
+        # The static index of each interned string literal
+        self.string_slots = {}
+        self.string_label_count = -1
+        self.inline_threshold = inline_threshold
+
+    # ========== Declarations ========== #
+
+    def start_class(self, name):
+        self.class_name = name
+
+    def end_class(self):
+        if self.string_slots:
+            self.__write_string_table()
+
+    def visit_class(self, node):
+        self.start_class(node.name)
+        for var_dec in node.var_decs:
+            var_dec.accept(self)
+        for subroutine in node.subroutines:
+            subroutine.accept(self)
+        self.end_class()
+
+    def visit_class_var_dec(self, node):
+        for name in node.names:
+            self.symbol_table.define(name, node.var_type, node.kind)
+
+    def visit_subroutine(self, node):
+        self.symbol_table.start_subroutine()
+        if node.kind == "method":
+            self.symbol_table.define("this", self.class_name, "argument")
+        for var_type, name in node.parameters:
+            self.symbol_table.define(name, var_type, "argument")
+        for var_dec in node.var_decs:
+            var_dec.accept(self)
+        num_locals = self.symbol_table.var_count("local")
+        self.vm_writer.write_function("{}.{}".format(self.class_name,
+                                                     node.name), num_locals)
+        self.__set_pointer(node.kind)
+        self.__statements(node.statements)
+
+    def visit_var_dec(self, node):
+        for name in node.names:
+            self.symbol_table.define(name, node.var_type, "var")
+
+    # ========== Statements ========== #
+
+    def visit_do(self, node):
+        if node.call is not None:
+            node.call.accept(self)
+        # Since we don't use the return value, we pop it to temp
+        self.vm_writer.write_pop("temp", 0)
+
+    def visit_let(self, node):
+        if node.index is not None:
+            self.__array_address(node.name, node.index)
+        node.value.accept(self)
+        # Pop the value to the spot in the memory
+        if node.index is not None:
+            self.vm_writer.write_pop("temp", 0)
+            self.vm_writer.write_pop("pointer", 1)
+            self.vm_writer.write_push("temp", 0)
+            self.vm_writer.write_pop("that", 0)
+        else:
+            self.__write_pop(node.name)
+
+    def visit_while(self, node):
+        loop_label = self.__get_label("WHILE_START")
+        exit_label = self.__get_label("WHILE_END")
+        self.vm_writer.write_label(loop_label)
+        # Compute ~condition
+        node.condition.accept(self)
+        self.vm_writer.write_arithmetic("~")
+        # if ~condition exit loop
+        self.vm_writer.write_if(exit_label)
+        self.__statements(node.statements)
+        self.vm_writer.write_goto(loop_label)
+        self.vm_writer.write_label(exit_label)
+
+    def visit_return(self, node):
+        if node.value is not None:
+            node.value.accept(self)
+        else:
+            # Void function - push 0
+            self.vm_writer.write_push(CONSTANT, 0)
+        self.vm_writer.write_return()
+
+    def visit_if(self, node):
+        node.condition.accept(self)
+        if_true = self.__get_label("IF_TRUE")
+        self.vm_writer.write_if(if_true)
+        if_false = self.__get_label("IF_FALSE")
+        self.vm_writer.write_goto(if_false)
+        self.vm_writer.write_label(if_true)
+        self.__statements(node.statements)
+        # Handle else:
+        if node.else_statements is not None:
+            if_end = self.__get_label("IF_END")
+            self.vm_writer.write_goto(if_end)
+            self.vm_writer.write_label(if_false)
+            self.__statements(node.else_statements)
+            self.vm_writer.write_label(if_end)
+        else:
+            self.vm_writer.write_label(if_false)
+
+    # ========== Expressions ========== #
+
+    def visit_expression(self, node):
+        """
+        :return: The value of the expression if it is constant, None
+        otherwise.
+        """
+        mark = self.vm_writer.mark()
+        value = node.term.accept(self)
+        for operation, term in node.operations:
+            right_mark = self.vm_writer.mark()
+            right = term.accept(self)
+            if value is not None and right is not None:
+                value = fold_binary(operation, value, right)
+                if value is not None:
+                    # Replace the code of both operands with the result
+                    self.vm_writer.rewind(mark)
+                    self.__write_constant(value)
+                    continue
+            elif value is not None or right is not None:
+                reduced = self.__strength_reduce(operation, mark, right_mark,
+                                                 value, right)
+                value = None
+                if reduced:
+                    continue
+            self.vm_writer.write_arithmetic(operation)
+        return value
+
+    def visit_integer_constant(self, node):
+        value = int(node.value)
+        self.vm_writer.write_push(CONSTANT, value)
+        # Out of range constants are left for the VM to reject
+        return value if value <= MAX_INT else None
+
+    def visit_string_constant(self, node):
+        if self.intern_strings:
+            self.__push_interned_string(node.value)
+        else:
+            self.__build_string(node.value)
+
+    def visit_keyword_constant(self, node):
+        """
+        :return: The value of the keyword if it is constant, None for this.
+        """
+        if node.word == "this":
+            self.vm_writer.write_push("pointer", 0)
+            return None
+        self.vm_writer.write_push(CONSTANT, 0)
+        if node.word == "true":
+            self.vm_writer.write_arithmetic("~")
+            return TRUE
+        return FALSE
+
+    def visit_var_name(self, node):
+        self.__write_push(node.name)
+
+    def visit_array_access(self, node):
+        self.__array_address(node.name, node.index)
+        self.vm_writer.write_pop("pointer", 1)
+        self.vm_writer.write_push("that", 0)
+
+    def visit_subroutine_call(self, node):
+        n_args = 0
+        type_name = node.receiver
+        if type_name is None:
+            # A method of this
+            self.vm_writer.write_push("pointer", 0)
+            type_name = self.class_name
+            n_args = 1
+        elif self.symbol_table.kind_of(type_name):
+            # Push the object reference to the stack
+            self.__write_push(type_name)
+            type_name = self.symbol_table.type_of(type_name)
+            n_args = 1
+        for argument in node.arguments:
+            argument.accept(self)
+        self.vm_writer.write_call("{}.{}".format(type_name, node.name),
+                                  len(node.arguments) + n_args)
+
+    def visit_parenthesized(self, node):
+        return node.expression.accept(self)
+
+    def visit_unary_op(self, node):
+        """
+        :return: The value of the term if it is constant, None otherwise.
+        """
+        mark = self.vm_writer.mark()
+        value = node.term.accept(self)
+        if value is not None:
+            value = fold_unary(node.op, value)
+            self.vm_writer.rewind(mark)
+            self.__write_constant(value)
+            return value
+        if node.op == "-":
+            self.vm_writer.write_arithmetic("neg")
+        else:
+            self.vm_writer.write_arithmetic(node.op)
+
+    # ========== VM Helper ========== #
+
+    def __statements(self, statements):
+        for statement in statements:
+            statement.accept(self)
+
+    def __set_pointer(self, kind):
+        if kind == "method":
+            self.vm_writer.write_push("argument", 0)
+            self.vm_writer.write_pop("pointer", 0)
+        elif kind == "constructor":
+            self.__handle_constructor()
+
+    def __handle_constructor(self):
+        # Allocate memory for the new object
+        var_num = self.symbol_table.var_count("this")
+        self.vm_writer.write_push(CONSTANT, var_num)
+        self.vm_writer.write_call("Memory.alloc", 1)
+        # Set the new memory spot to this
+        self.vm_writer.write_pop("pointer", 0)
+
+    def __array_address(self, name, index):
+        """
+        Pushes the address of name[index].
+        """
+        index.accept(self)
+        self.__write_push(name)
+        self.vm_writer.write_arithmetic("+")
+
+    def __push_interned_string(self, string):
+        """
+        Pushes the string kept in the literal's static variable, building
+        it there first if this is the first time any site evaluates it.
+        :param string: the constant
+        """
+        slot = self.string_slots.get(string)
+        if slot is None:
+            # Class statics are all declared before the first subroutine
+            slot = self.symbol_table.var_count("static") + \
+                len(self.string_slots)
+            self.string_slots[string] = slot
+        self.string_label_count += 1
+        ready_label = "STRING_READY{}".format(self.string_label_count)
+        self.vm_writer.write_push("static", slot)
+        self.vm_writer.write_if(ready_label)
+        self.__build_string(string)
+        self.vm_writer.write_pop("static", slot)
+        self.vm_writer.write_label(ready_label)
+        self.vm_writer.write_push("static", slot)
+
+    def __write_string_table(self):
+        """
+        Writes the table of interned string literals, as vm comments.
+        """
+        self.vm_writer.write_comment("string literals of {}".format(
+            self.class_name))
+        for string, slot in self.string_slots.items():
+            self.vm_writer.write_comment("static {}: \"{}\"".format(slot,
+                                                                     string))
+
+    def __build_string(self, string):
+        """
+        Pushes a new string built from the given constant.
+        :param string: the constant
+        """
+        self.vm_writer.write_push(CONSTANT, len(string))
+        self.vm_writer.write_call("String.new", 1)
+        for char in string:
+            self.vm_writer.write_push(CONSTANT, ord(char))
+            self.vm_writer.write_call("String.appendChar", 2)
+
+    def __strength_reduce(self, operation, mark, right_mark, left, right):
+        """
+        Compiles a multiplication or division where one operand is constant
+        without calling Math, if that is cheap enough.
+        :param operation: The operator.
+        :param mark: The mark before the code of the left operand.
+        :param right_mark: The mark before the code of the right operand.
+        :param left: The value of the left operand if it is constant.
+        :param right: The value of the right operand if it is constant.
+        :return: True if the operation was compiled, False if it is left to
+        the caller.
+        """
+        if operation == "*":
+            factor = left if right is None else right
+            if not self.__can_multiply(factor, mark, right_mark, left):
+                return False
+        elif operation == "/" and right in (1, -1):
+            factor = right
+        else:
+            return False
+        # Drop the constant operand's code, leaving the other one's code
+        # (and value) on its own
+        if right is None:
+            self.vm_writer.remove(mark, right_mark)
+        else:
+            self.vm_writer.rewind(right_mark)
+        self.__reduce_multiplication(factor, mark)
+        return True
+
+    def __can_multiply(self, factor, mark, right_mark, left):
+        """
+        :return: True if multiplying by the factor inline costs at most the
+        inline threshold.
+        """
+        if factor == -MAX_INT - 1:
+            return False
+        start = right_mark if left is not None else mark
+        end = None if left is not None else right_mark
+        operand = self.vm_writer.get_commands(start)
+        if end is not None:
+            operand = operand[:end - start]
+        return self.__multiplication_cost(factor, operand) <= \
+            self.inline_threshold
+
+    @staticmethod
+    def __repeatable(operand):
+        """
+        :param operand: The commands computing an operand.
+        :return: The operand's push command if it is a single push that can
+        be repeated to get the same value, None otherwise.
+        """
+        if len(operand) == 1:
+            words = operand[0].split()
+            if words[0] == "push" and words[1] in _REPEATABLE_SEGMENTS:
+                return words
+        return None
+
+    def __multiplication_cost(self, factor, operand):
+        """
+        :return: The number of commands __reduce_multiplication spends on
+        multiplying the given operand by the factor.
+        """
+        magnitude = abs(factor)
+        cost = 1 if factor < 0 else 0
+        if magnitude <= 1:
+            return cost
+        bits = bin(magnitude)[3:]
+        repeatable = self.__repeatable(operand) is not None
+        # Doubling the accumulator, the first time from the operand itself
+        cost += 4 * len(bits) - (2 if repeatable else 0)
+        if "1" in bits:
+            cost += 2 * bits.count("1") + (0 if repeatable else 2)
+        return cost
+
+    def __reduce_multiplication(self, factor, mark):
+        """
+        Multiplies the operand whose code was written since the mark by a
+        constant factor, with doublings and additions: the factor's bits
+        are consumed from the most significant one, doubling the
+        accumulated product and adding the operand for every set bit.
+        temp 1 holds the operand and temp 2 the product while doubling.
+        :param factor: The constant factor.
+        :param mark: The mark before the operand's code.
+        """
+        writer = self.vm_writer
+        operand = writer.get_commands(mark)
+        magnitude = abs(factor)
+        if magnitude == 0:
+            if any(command.startswith("call ") for command in operand):
+                # Keep the operand's side effects, but not its value
+                writer.write_pop("temp", 0)
+            else:
+                writer.rewind(mark)
+            self.__write_constant(0)
+            return
+        repeat = self.__repeatable(operand)
+        bits = bin(magnitude)[3:]
+        if repeat is None and "1" in bits:
+            writer.write_pop("temp", 1)
+            writer.write_push("temp", 1)
+        product_is_operand = True
+        for bit in bits:
+            if product_is_operand and repeat is not None:
+                writer.write_push(repeat[1], repeat[2])
+            else:
+                writer.write_pop("temp", 2)
+                writer.write_push("temp", 2)
+                writer.write_push("temp", 2)
+            writer.write_arithmetic("+")
+            product_is_operand = False
+            if bit == "1":
+                if repeat is not None:
+                    writer.write_push(repeat[1], repeat[2])
+                else:
+                    writer.write_push("temp", 1)
+                writer.write_arithmetic("+")
+        if factor < 0:
+            writer.write_arithmetic("neg")
+
+    def __write_constant(self, value):
+        """
+        Pushes a constant word with the shortest sequence of commands.
+        :param value: A signed 16 bit value
+        """
+        if value >= 0:
+            self.vm_writer.write_push(CONSTANT, value)
+        elif value == TRUE or value == -MAX_INT - 1:
+            # ~0 is true, ~32767 is the one value whose negation overflows
+            self.vm_writer.write_push(CONSTANT, -value - 1)
+            self.vm_writer.write_arithmetic("~")
+        else:
+            self.vm_writer.write_push(CONSTANT, -value)
+            self.vm_writer.write_arithmetic("neg")
+
+    def __get_label(self, label):
+        self.label_count += 1
+        return "{}{}".format(label, str(self.label_count))
+
+    def __write_pop(self, name):
+        self.vm_writer.write_pop(self.symbol_table.kind_of(name),
+                                 self.symbol_table.index_of(name))
+
+    def __write_push(self, name):
+        self.vm_writer.write_push(self.symbol_table.kind_of(name),
+                                  self.symbol_table.index_of(name))
+
+
+class SourceMapGenerator(VMGenerator):
+    """
+    A VMGenerator that also records the jack line of the code of each
+    subroutine and statement in its VMWriter, for a source map (see
+    VMWriter.locate). Compiling without a source map uses VMGenerator
+    itself, and pays nothing for it.
+    """
+
+    def __init__(self, vm_writer, line_of, intern_strings=False,
+                 inline_threshold=DEFAULT_INLINE_THRESHOLD):
+        """
+        :param line_of: Gives the line of an offset in the source, see
+        Tokenizer.line_of.
+        The other parameters are those of VMGenerator.
+        """
+        super().__init__(vm_writer, intern_strings, inline_threshold)
+        self.line_of = line_of
+
+    def visit_subroutine(self, node):
+        writer = self.vm_writer
+        mark = writer.mark()
+        written_count = writer.written_count
+        super().visit_subroutine(node)
+        # Starting the function may have flushed the commands before it
+        if writer.written_count != written_count:
+            mark = 0
+        writer.locate(mark, self.line_of(node.start))
+
+    def visit_do(self, node):
+        self.__locate(super().visit_do, node)
+
+    def visit_let(self, node):
+        self.__locate(super().visit_let, node)
+
+    def visit_while(self, node):
+        self.__locate(super().visit_while, node)
+
+    def visit_return(self, node):
+        self.__locate(super().visit_return, node)
+
+    def visit_if(self, node):
+        self.__locate(super().visit_if, node)
+
+    def __locate(self, visit, node):
+        """
+        Generates the code of a statement, and records its line.
+        :param visit: The VMGenerator method of the statement.
+        """
+        mark = self.vm_writer.mark()
+        visit(node)
+        self.vm_writer.locate(mark, self.line_of(node.start))
@@ -1,20 +1,144 @@
+import os
+from SourceMap import SourceLine, MAP_SUFFIX
+
+
 class VMWriter:
     _OP_DICT = {"+": "add", "-": "sub", "=": "eq", "&": "and", "|": "or",
                 ">": "gt", "<": "lt", "~": "not", "neg": "neg"}
 
-    def __init__(self, out_address):
+    def __init__(self, out_address=None, flush_threshold=None, passes=(),
+                 atomic=False, source_map=None):
+        """
+        :param out_address: The address of the vm file to write, None to
+        only keep the code in memory, see get_text.
+        :param flush_threshold: If given, the buffered commands are flushed
+        to the file whenever a new function starts and at least this many
+        commands are buffered. Otherwise everything is kept in memory until
+        write_file is called.
+        :param passes: Optimization passes, objects with a run method
+        taking and returning a list of commands. They run on the buffered
+        commands, which are always whole functions, before they are written.
+        :param atomic: True to write a temporary file next to the output
+        file and rename it over the output file once complete, so that
+        readers never see a partially written file.
+        :param source_map: A SourceMap to record the jack line of each
+        command in, see locate, None to record none. write_file writes it
+        next to the output file.
+        """
         self.out_address = out_address
-        self.output = ""
+        self.flush_threshold = flush_threshold
+        self.passes = passes
+        self.atomic = atomic
+        self.source_map = source_map
+        # Append-only buffer of the commands not yet written
+        self.commands = []
+        # The number of commands written, after the passes
+        self.written_count = 0
+        self.__out_file = None
 
     def write_file(self):
-        with open(self.out_address, 'w') as f:
-            f.write(self.output)
+        """
+        Writes all remaining commands to the output file.
+        """
+        self.flush()
+        if self.__out_file is None:
+            # Nothing was flushed, still create the (empty) file
+            self.__out_file = open(self.__write_address(), 'w')
+        self.__out_file.close()
+        self.__out_file = None
+        if self.atomic:
+            os.replace(self.__write_address(), self.out_address)
+        if self.source_map is not None:
+            map_address = self.out_address + MAP_SUFFIX
+            self.source_map.write(self.__write_address(map_address))
+            if self.atomic:
+                os.replace(self.__write_address(map_address), map_address)
+
+    def flush(self):
+        """
+        Writes the buffered commands to the output file.
+        """
+        if not self.commands:
+            return
+        if self.__out_file is None:
+            self.__out_file = open(self.__write_address(), 'w')
+        self.__out_file.write(self.get_text())
+
+    def __write_address(self, address=None):
+        """
+        :param address: The address of an output file, the vm file's if not
+        given.
+        :return: The address the file is written to.
+        """
+        if address is None:
+            address = self.out_address
+        if self.atomic:
+            return "{}.{}.tmp".format(address, os.getpid())
+        return address
+
+    def get_text(self):
+        """
+        Takes the buffered commands out of the buffer, as vm code.
+        :return: The code of the commands, after the passes.
+        """
+        commands = self.commands
+        for optimization in self.passes:
+            commands = optimization.run(commands)
+        self.commands = []
+        if self.source_map is not None:
+            self.source_map.add(commands, self.written_count + 1)
+        self.written_count += len(commands)
+        if not commands:
+            return ""
+        commands.append("")
+        return "\n".join(commands)
+
+    def mark(self):
+        """
+        :return: A position in the buffered commands, to rewind to later.
+        Valid until the next function starts.
+        """
+        return len(self.commands)
+
+    def rewind(self, mark):
+        """
+        Drops the commands written since the given mark.
+        :param mark: A position returned by mark.
+        """
+        del self.commands[mark:]
+
+    def remove(self, start, end):
+        """
+        Drops the commands written between two marks.
+        :param start: The mark of the first command to drop.
+        :param end: The mark after the last command to drop.
+        """
+        del self.commands[start:end]
+
+    def locate(self, mark, line):
+        """
+        Records the jack line of the commands written since the given mark,
+        unless their first command already has one, from a statement
+        nested in theirs.
+        :param mark: A position returned by mark.
+        :param line: The jack line, counted from 1.
+        """
+        commands = self.commands
+        if mark < len(commands) and type(commands[mark]) is not SourceLine:
+            commands[mark] = SourceLine(commands[mark], line)
+
+    def get_commands(self, mark):
+        """
+        :param mark: A position returned by mark.
+        :return: The commands written since the mark.
+        """
+        return self.commands[mark:]
 
     def write_push(self, segment, index):
-        self.output += "push {} {}\n".format(segment, str(index))
+        self.commands.append("push {} {}".format(segment, index))
 
     def write_pop(self, segment, index):
-        self.output += "pop {} {}\n".format(segment, str(index))
+        self.commands.append("pop {} {}".format(segment, index))
 
     def write_arithmetic(self, command):
         if command == "*":
@@ -22,22 +146,30 @@ class VMWriter:
         elif command == "/":
             self.write_call("Math.divide", 2)
         else:
-            self.output += "{}\n".format(VMWriter._OP_DICT[command])
+            self.commands.append(VMWriter._OP_DICT[command])
 
     def write_label(self, label):
-        self.output += "label {}\n".format(label)
+        self.commands.append("label {}".format(label))
 
     def write_goto(self, label):
-        self.output += "goto {}\n".format(label)
+        self.commands.append("goto {}".format(label))
 
     def write_if(self, label):
-        self.output += "if-goto {}\n".format(label)
+        self.commands.append("if-goto {}".format(label))
 
     def write_call(self, name, nArgs):
-        self.output += "call {} {}\n".format(name, str(nArgs))
+        self.commands.append("call {} {}".format(name, nArgs))
 
     def write_function(self, name, nLocals):
-        self.output += "function {} {}\n".format(name, str(nLocals))
+        # Only flush between functions, so that a function's commands are
+        # always buffered together
+        if self.flush_threshold is not None and \
+                len(self.commands) >= self.flush_threshold:
+            self.flush()
+        self.commands.append("function {} {}".format(name, nLocals))
 
     def write_return(self):
-        self.output += "return\n"
+        self.commands.append("return")
+
+    def write_comment(self, comment):
+        self.commands.append("// {}".format(comment))
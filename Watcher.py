@@ -0,0 +1,144 @@
+"""
+Waits for changes in directories, for JackAnalyzer --watch: through inotify
+where the C library provides it, by polling otherwise. A watcher only tells
+when something may have changed, the caller finds out what by comparing
+snapshots of the files (see snapshot).
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import time
+
+# Seconds between two polls of the polling watcher
+POLL_INTERVAL = 0.5
+# inotify events of interest, see inotify(7): a file written and closed,
+# moved in or out, created, deleted, or its attributes changed
+_IN_ATTRIB = 0x4
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_MASK = _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | \
+    _IN_CREATE | _IN_DELETE
+_READ_SIZE = 64 * 1024
+
+
+def snapshot(files):
+    """
+    :param files: The addresses of files.
+    :return: The modification time and size of each file that exists, by
+    its address.
+    """
+    stats = {}
+    for address in files:
+        try:
+            stat = os.stat(address)
+        except OSError:
+            continue
+        stats[address] = (stat.st_mtime_ns, stat.st_size)
+    return stats
+
+
+def changed_files(before, after):
+    """
+    :param before: An earlier snapshot.
+    :param after: A later snapshot.
+    :return: The addresses of the files that appeared or changed between
+    them, in the order of the later snapshot.
+    """
+    return [address for address, stat in after.items()
+            if before.get(address) != stat]
+
+
+class PollingWatcher:
+    """
+    Reports a possible change every poll interval.
+    """
+
+    def __init__(self, directories, interval=POLL_INTERVAL):
+        """
+        :param directories: The directories to watch.
+        :param interval: The seconds between two polls.
+        """
+        self.directories = directories
+        self.interval = interval
+
+    def wait(self, timeout=None):
+        """
+        Waits for the next poll.
+        :param timeout: The most seconds to wait, the poll interval if not
+        given.
+        :return: True if something may have changed.
+        """
+        time.sleep(self.interval if timeout is None
+                   else min(timeout, self.interval))
+        return True
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """
+    Reports the changes inotify sees in the directories, without polling.
+    """
+
+    def __init__(self, directories):
+        """
+        :param directories: The directories to watch.
+        :raise OSError: If inotify is not available.
+        """
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("no C library")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        try:
+            init = libc.inotify_init1
+            add_watch = libc.inotify_add_watch
+        except AttributeError:
+            raise OSError("inotify is not available")
+        self.directories = directories
+        self.fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        for directory in directories:
+            if add_watch(self.fd, os.fsencode(directory), _IN_MASK) < 0:
+                error = ctypes.get_errno()
+                os.close(self.fd)
+                raise OSError(error, "cannot watch {}".format(directory))
+
+    def wait(self, timeout=None):
+        """
+        Waits for events, and discards them.
+        :param timeout: The most seconds to wait, forever if not given.
+        :return: True if an event arrived.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        try:
+            while os.read(self.fd, _READ_SIZE):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        os.close(self.fd)
+
+
+def create_watcher(directories, poll=False):
+    """
+    :param directories: The directories to watch.
+    :param poll: True to poll even if inotify is available.
+    :return: An InotifyWatcher if inotify is available and poll is False,
+    a PollingWatcher otherwise.
+    """
+    if not poll:
+        try:
+            return InotifyWatcher(directories)
+        except OSError:
+            pass
+    return PollingWatcher(directories)
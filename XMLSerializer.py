@@ -0,0 +1,299 @@
+from TokenTypes import KEYWORD_KIND, SYMBOL_KIND, INT_CONST_KIND
+from TokenTypes import STRING_CONST_KIND, IDENTIFIER_KIND
+from JackTokenizer import XML_TAGS, XML_ESCAPES, XML_CHUNK_SIZE
+
+XML_INDENT = 2
+# The types that are keywords rather than class names
+_KEYWORD_TYPES = frozenset(["int", "char", "boolean", "void"])
+_SECTIONS = ("class", "classVarDec", "subroutineDec", "parameterList",
+             "subroutineBody", "varDec", "statements", "letStatement",
+             "ifStatement", "whileStatement", "doStatement",
+             "returnStatement", "expression", "term", "expressionList")
+_OPEN_TAGS = {name: "<{}>\n".format(name) for name in _SECTIONS}
+_CLOSE_TAGS = {name: "</{}>\n".format(name) for name in _SECTIONS}
+
+
+def _terminal_lines(kind, tokens):
+    """
+    :return: The xml of each of the given tokens of a kind, by the token.
+    """
+    open_tag, close_tag = XML_TAGS[kind]
+    return {token: open_tag + token.translate(XML_ESCAPES) + close_tag
+            for token in tokens}
+
+
+# Keywords and symbols are a closed set, their xml is precomputed
+_KEYWORD_LINES = _terminal_lines(KEYWORD_KIND, [
+    "class", "constructor", "function", "method", "field", "static", "var",
+    "int", "char", "boolean", "void", "true", "false", "null", "this", "let",
+    "do", "if", "else", "while", "return"])
+_SYMBOL_LINES = _terminal_lines(SYMBOL_KIND, "{}()[].,;+-*/&|<>=~")
+
+
+class XMLSerializer:
+    """
+    Writes the parse tree of a class as xml, from its abstract syntax tree
+    (see JackAST), in the format of the nand2tetris syntax analyzer: every
+    terminal on a line of its own, and every non-terminal wrapping its
+    children two spaces deeper. The lines are streamed to the output file in
+    chunks, and a class can be serialized a declaration at a time, as the
+    Parser hands them over.
+    """
+
+    def __init__(self, out_file):
+        """
+        :param out_file: A file open for writing.
+        """
+        self.out_file = out_file
+        self.chunk = []
+        self.depth = 0
+        # The indentation of each depth reached so far
+        self.__indents = [""]
+
+    def flush(self):
+        """
+        Writes the lines serialized so far to the output file.
+        """
+        self.out_file.write("".join(self.chunk))
+        self.chunk = []
+
+    # ========== Declarations ========== #
+
+    def start_class(self, name):
+        """
+        Serializes the beginning of a class, up to its first declaration.
+        """
+        self.open("class")
+        self.keyword("class")
+        self.terminal(IDENTIFIER_KIND, name)
+        self.symbol("{")
+
+    def end_class(self):
+        """
+        Serializes the end of a class, after its last subroutine.
+        """
+        self.symbol("}")
+        self.close("class")
+        self.flush()
+
+    def visit_class(self, node):
+        self.start_class(node.name)
+        for var_dec in node.var_decs:
+            var_dec.accept(self)
+        for subroutine in node.subroutines:
+            subroutine.accept(self)
+        self.end_class()
+
+    def visit_class_var_dec(self, node):
+        self.open("classVarDec")
+        self.keyword(node.kind)
+        self.__type(node.var_type)
+        self.__names(node.names)
+        self.symbol(";")
+        self.close("classVarDec")
+
+    def visit_subroutine(self, node):
+        self.open("subroutineDec")
+        self.keyword(node.kind)
+        self.__type(node.return_type)
+        self.terminal(IDENTIFIER_KIND, node.name)
+        self.symbol("(")
+        self.open("parameterList")
+        for index, (var_type, name) in enumerate(node.parameters):
+            if index:
+                self.symbol(",")
+            self.__type(var_type)
+            self.terminal(IDENTIFIER_KIND, name)
+        self.close("parameterList")
+        self.symbol(")")
+        self.open("subroutineBody")
+        self.symbol("{")
+        for var_dec in node.var_decs:
+            var_dec.accept(self)
+        self.__statements(node.statements)
+        self.symbol("}")
+        self.close("subroutineBody")
+        self.close("subroutineDec")
+
+    def visit_var_dec(self, node):
+        self.open("varDec")
+        self.keyword("var")
+        self.__type(node.var_type)
+        self.__names(node.names)
+        self.symbol(";")
+        self.close("varDec")
+
+    # ========== Statements ========== #
+
+    def visit_do(self, node):
+        self.open("doStatement")
+        self.keyword("do")
+        if node.call is not None:
+            node.call.accept(self)
+        self.symbol(";")
+        self.close("doStatement")
+
+    def visit_let(self, node):
+        self.open("letStatement")
+        self.keyword("let")
+        self.terminal(IDENTIFIER_KIND, node.name)
+        if node.index is not None:
+            self.symbol("[")
+            node.index.accept(self)
+            self.symbol("]")
+        self.symbol("=")
+        node.value.accept(self)
+        self.symbol(";")
+        self.close("letStatement")
+
+    def visit_while(self, node):
+        self.open("whileStatement")
+        self.keyword("while")
+        self.__condition(node.condition)
+        self.__block(node.statements)
+        self.close("whileStatement")
+
+    def visit_return(self, node):
+        self.open("returnStatement")
+        self.keyword("return")
+        if node.value is not None:
+            node.value.accept(self)
+        self.symbol(";")
+        self.close("returnStatement")
+
+    def visit_if(self, node):
+        self.open("ifStatement")
+        self.keyword("if")
+        self.__condition(node.condition)
+        self.__block(node.statements)
+        if node.else_statements is not None:
+            self.keyword("else")
+            self.__block(node.else_statements)
+        self.close("ifStatement")
+
+    # ========== Expressions ========== #
+
+    def visit_expression(self, node):
+        self.open("expression")
+        self.__term(node.term)
+        for operation, term in node.operations:
+            self.symbol(operation)
+            self.__term(term)
+        self.close("expression")
+
+    def visit_integer_constant(self, node):
+        self.terminal(INT_CONST_KIND, node.value)
+
+    def visit_string_constant(self, node):
+        self.terminal(STRING_CONST_KIND, node.value.translate(XML_ESCAPES))
+
+    def visit_keyword_constant(self, node):
+        self.keyword(node.word)
+
+    def visit_var_name(self, node):
+        self.terminal(IDENTIFIER_KIND, node.name)
+
+    def visit_array_access(self, node):
+        self.terminal(IDENTIFIER_KIND, node.name)
+        self.symbol("[")
+        node.index.accept(self)
+        self.symbol("]")
+
+    def visit_subroutine_call(self, node):
+        if node.receiver is not None:
+            self.terminal(IDENTIFIER_KIND, node.receiver)
+            self.symbol(".")
+        self.terminal(IDENTIFIER_KIND, node.name)
+        self.symbol("(")
+        self.open("expressionList")
+        for index, argument in enumerate(node.arguments):
+            if index:
+                self.symbol(",")
+            argument.accept(self)
+        self.close("expressionList")
+        self.symbol(")")
+
+    def visit_parenthesized(self, node):
+        self.symbol("(")
+        node.expression.accept(self)
+        self.symbol(")")
+
+    def visit_unary_op(self, node):
+        self.symbol(node.op)
+        self.__term(node.term)
+
+    # ========== XML Handling ========== #
+
+    def open(self, section_name):
+        """
+        Opens a non-terminal section, indenting its children.
+        """
+        self.chunk.append(self.__indents[self.depth] +
+                          _OPEN_TAGS[section_name])
+        self.depth += 1
+        if self.depth == len(self.__indents):
+            self.__indents.append(self.depth * XML_INDENT * " ")
+
+    def close(self, section_name):
+        """
+        Closes the innermost non-terminal section.
+        """
+        self.depth -= 1
+        self.chunk.append(self.__indents[self.depth] +
+                          _CLOSE_TAGS[section_name])
+
+    def keyword(self, word):
+        self.chunk.append(self.__indents[self.depth] + _KEYWORD_LINES[word])
+
+    def symbol(self, symbol):
+        self.chunk.append(self.__indents[self.depth] + _SYMBOL_LINES[symbol])
+
+    def terminal(self, kind, token):
+        """
+        Writes a terminal that needs no escaping.
+        :param kind: The kind of the token, see TokenTypes.
+        :param token: The text of the token.
+        """
+        open_tag, close_tag = XML_TAGS[kind]
+        self.chunk.append(self.__indents[self.depth] + open_tag + token +
+                          close_tag)
+
+    def __term(self, node):
+        self.open("term")
+        node.accept(self)
+        self.close("term")
+
+    def __type(self, var_type):
+        if var_type is None:
+            return
+        if var_type in _KEYWORD_TYPES:
+            self.keyword(var_type)
+        else:
+            self.terminal(IDENTIFIER_KIND, var_type)
+
+    def __names(self, names):
+        """
+        Writes a comma separated list of variable names.
+        """
+        for index, name in enumerate(names):
+            if index:
+                self.symbol(",")
+            self.terminal(IDENTIFIER_KIND, name)
+
+    def __condition(self, condition):
+        self.symbol("(")
+        condition.accept(self)
+        self.symbol(")")
+
+    def __block(self, statements):
+        self.symbol("{")
+        self.__statements(statements)
+        self.symbol("}")
+
+    def __statements(self, statements):
+        self.open("statements")
+        for statement in statements:
+            statement.accept(self)
+            if len(self.chunk) >= XML_CHUNK_SIZE:
+                self.flush()
+        self.close("statements")
@@ -0,0 +1,5 @@
+"""
+Benchmarks for the Jack compiler. Run them from the repository root, e.g.:
+
+    python3 -m benchmarks.bench_statements
+"""
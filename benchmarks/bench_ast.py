@@ -0,0 +1,60 @@
+"""
+Benchmark of the shared syntax tree: the time to write the vm code alone,
+the xml parse tree alone, and both from a single parse, next to the two
+separate parses producing both outputs used to take.
+"""
+import os
+import sys
+import tempfile
+import time
+
+from CompilationEngine import CompilationEngine
+from JackTokenizer import Tokenizer
+from JackParser import Parser
+from XMLSerializer import XMLSerializer
+from benchmarks.bench_statements import generate_class
+
+SIZES = (12500, 25000, 50000)
+
+
+def write_xml(address):
+    """
+    Parses the file and writes its xml parse tree, without any vm code.
+    """
+    with open(address.replace(".jack", ".xml"), 'w') as f:
+        Parser(Tokenizer(address)).parse_class([XMLSerializer(f)])
+
+
+def measure(action, address):
+    """
+    :return: The wall time of running the action on the file, in seconds.
+    """
+    start = time.perf_counter()
+    action(address)
+    return time.perf_counter() - start
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    actions = (
+        ("vm", lambda a: CompilationEngine(a).write_file()),
+        ("xml", write_xml),
+        ("both, 1 parse",
+         lambda a: CompilationEngine(a, xml=True).write_file()),
+        ("both, 2 parses",
+         lambda a: (CompilationEngine(a).write_file(), write_xml(a))),
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        address = os.path.join(tmp, "Main.jack")
+        print("{:>10} {:<16} {:>10}".format("statements", "output",
+                                            "seconds"))
+        for size in sizes:
+            with open(address, "w") as f:
+                f.write(generate_class(size))
+            for name, action in actions:
+                print("{:>10} {:<16} {:>10.3f}".format(
+                    size, name, measure(action, address)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark of incremental re-tokenization: the time of single edits to a
+10k line source through IncrementalTokenizer.apply_edit, next to the time
+of tokenizing the whole source again. Each edit is undone right after, by
+the opposite edit, which is timed as well. The tokens are checked against
+a full tokenization at the end.
+
+    python3 -m benchmarks.bench_incremental [LINES]
+"""
+import sys
+import time
+
+from JackTokenizer import Tokenizer, IncrementalTokenizer
+from benchmarks.bench_statements import generate_class
+
+NUM_LINES = 10000
+REPEAT = 200
+
+
+def edits(source):
+    """
+    :return: The edits to measure by name, each as the offset, the number
+    of deleted characters and the inserted text.
+    """
+    middle = source.index("let i = i", len(source) // 2)
+    last = source.rindex("do Output")
+    return (
+        ("char in identifier", middle + 4, 0, "x"),
+        ("delete a char", middle + 4, 1, ""),
+        ("space between tokens", middle + 5, 0, " "),
+        ("char near the start", source.index("var int") + 4, 0, "x"),
+        ("char near the end", last + 3, 0, "x"),
+        ("open a string", middle + 8, 0, "\""),
+        ("open a comment", middle, 0, "/*"),
+    )
+
+
+def measure(tokenizer, offset, deleted, inserted):
+    """
+    Applies an edit and undoes it, REPEAT times.
+    :return: The median seconds of an edit.
+    """
+    removed = tokenizer.source[offset:offset + deleted]
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        tokenizer.apply_edit(offset, deleted, inserted)
+        middle = time.perf_counter()
+        tokenizer.apply_edit(offset, len(inserted), removed)
+        times.append(middle - start)
+        times.append(time.perf_counter() - middle)
+    times.sort()
+    return times[len(times) // 2]
+
+
+def main():
+    num_lines = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_LINES
+    # Besides the statements, the class has 6 lines
+    source = generate_class(num_lines - 6)
+    start = time.perf_counter()
+    Tokenizer(text=source)
+    full = time.perf_counter() - start
+    tokenizer = IncrementalTokenizer(text=source)
+    print("{} lines, {} tokens, full tokenization {:.1f} ms".format(
+        source.count("\n"), tokenizer.token_count(), full * 1000))
+    print("{:<24} {:>10} {:>10}".format("edit", "median us", "speedup"))
+    for name, offset, deleted, inserted in edits(source):
+        seconds = measure(tokenizer, offset, deleted, inserted)
+        print("{:<24} {:>10.1f} {:>9.0f}x".format(name, seconds * 1e6,
+                                                  full / seconds))
+    # Typing from one end of the file to the other moves the gap across
+    # all the tokens
+    start = time.perf_counter()
+    tokenizer.apply_edit(0, 0, " ")
+    tokenizer.apply_edit(len(tokenizer.source) - 1, 0, " ")
+    tokenizer.apply_edit(0, 1, "")
+    print("{:<24} {:>10.1f}".format("jump across the file", (
+        time.perf_counter() - start) / 3 * 1e6))
+    tokenizer.settle()
+    reference = Tokenizer(text=tokenizer.source)
+    assert tokenizer.kinds == reference.kinds
+    assert list(tokenizer.starts) == list(reference.starts)
+    assert list(tokenizer.ends) == list(reference.ends)
+
+
+if __name__ == '__main__':
+    main()
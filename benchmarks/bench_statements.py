@@ -0,0 +1,60 @@
+"""
+Stress benchmark: compiles a single subroutine with a growing number of
+statements, to show that the compiler scales linearly in the number of
+statements and never runs into the recursion limit.
+"""
+import os
+import sys
+import tempfile
+import time
+
+from CompilationEngine import CompilationEngine
+
+SIZES = (6250, 12500, 25000, 50000)
+
+
+def generate_class(num_statements):
+    """
+    :param num_statements: The number of statements in the subroutine.
+    :return: The source of a class with one long subroutine.
+    """
+    lines = ["class Main {", "    function void main() {",
+             "        var int i, j;"]
+    for n in range(num_statements):
+        if n % 4 == 0:
+            lines.append("        let i = i + {};".format(n % 100))
+        elif n % 4 == 1:
+            lines.append("        let j = (i * 2) - j;")
+        elif n % 4 == 2:
+            lines.append("        if (i > j) { let i = j; }")
+        else:
+            lines.append("        do Output.printInt(i);")
+    lines += ["        return;", "    }", "}", ""]
+    return "\n".join(lines)
+
+
+def compile_once(address):
+    """
+    :return: The wall time of compiling the given file, in seconds.
+    """
+    start = time.perf_counter()
+    CompilationEngine(address).write_file()
+    return time.perf_counter() - start
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    with tempfile.TemporaryDirectory() as tmp:
+        address = os.path.join(tmp, "Main.jack")
+        print("{:>10} {:>10} {:>14}".format("statements", "seconds",
+                                             "us/statement"))
+        for size in sizes:
+            with open(address, "w") as f:
+                f.write(generate_class(size))
+            elapsed = compile_once(address)
+            print("{:>10} {:>10.3f} {:>14.2f}".format(size, elapsed,
+                                                      elapsed / size * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Memory benchmark: reports the bytes retained per token by Tokenizer's
+array-backed token store, next to a list of per-token objects with a
+__dict__ as the tokenizer used to keep.
+"""
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from JackTokenizer import Tokenizer
+from benchmarks.bench_statements import generate_class
+
+NUM_STATEMENTS = 50000
+
+
+class DictToken:
+    """
+    A token as it used to be stored: an object with a __dict__, holding a
+    copy of its text and its type name.
+    """
+
+    def __init__(self, token_type, token):
+        self.token = token
+        self.token_type = token_type
+
+
+def measure(build):
+    """
+    :param build: A function building a token store.
+    :return: The store and the bytes it retains.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return store, after - before
+
+
+def main():
+    num_statements = int(sys.argv[1]) if len(sys.argv) > 1 \
+        else NUM_STATEMENTS
+    with tempfile.TemporaryDirectory() as tmp:
+        address = os.path.join(tmp, "Main.jack")
+        with open(address, "w") as f:
+            f.write(generate_class(num_statements))
+        source_size = os.path.getsize(address)
+        tokenizer, arrays_size = measure(lambda: Tokenizer(address))
+        count = tokenizer.token_count()
+
+        def build_objects():
+            return [DictToken(tokenizer.token_at(i).get_type(),
+                              tokenizer.source[tokenizer.starts[i]:
+                                               tokenizer.ends[i]])
+                    for i in range(count)]
+
+        _, objects_size = measure(build_objects)
+    print("{} tokens from {} bytes of source".format(count, source_size))
+    print("{:<16} {:>12} {:>16}".format("store", "bytes", "bytes/token"))
+    print("{:<16} {:>12} {:>16.1f}".format("arrays+source", arrays_size,
+                                           arrays_size / count))
+    print("{:<16} {:>12} {:>16.1f}".format("token objects", objects_size,
+                                           objects_size / count))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Micro-benchmark: emits up to 1M VM commands through the old
+string-concatenating writer and through VMWriter's chunk buffer, and writes
+them to a file. The old writer is quadratic, so it is only measured up to
+CONCAT_LIMIT commands.
+"""
+import os
+import sys
+import tempfile
+import time
+
+from VMWriter import VMWriter
+
+SIZES = (31250, 62500, 125000, 1000000)
+CONCAT_LIMIT = 125000
+
+
+class ConcatVMWriter:
+    """
+    The previous VMWriter, which grew a single string with +=.
+    """
+
+    def __init__(self, out_address):
+        self.out_address = out_address
+        self.output = ""
+
+    def write_file(self):
+        with open(self.out_address, 'w') as f:
+            f.write(self.output)
+
+    def write_push(self, segment, index):
+        self.output += "push {} {}\n".format(segment, str(index))
+
+    def write_call(self, name, nArgs):
+        self.output += "call {} {}\n".format(name, str(nArgs))
+
+    def write_function(self, name, nLocals):
+        self.output += "function {} {}\n".format(name, str(nLocals))
+
+
+def emit(writer, num_commands):
+    """
+    Emits the command pattern of a string literal, a function every 1000
+    commands, and writes the file.
+    :return: The wall time in seconds.
+    """
+    start = time.perf_counter()
+    for n in range(num_commands // 2):
+        if n % 500 == 0:
+            writer.write_function("Main.f{}".format(n), 0)
+        writer.write_push("constant", 72)
+        writer.write_call("String.appendChar", 2)
+    writer.write_file()
+    return time.perf_counter() - start
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    with tempfile.TemporaryDirectory() as tmp:
+        address = os.path.join(tmp, "Main.vm")
+        print("{:>9} {:>10} {:>10} {:>14}".format(
+            "commands", "concat", "chunks", "chunks+flush"))
+        for size in sizes:
+            if size <= CONCAT_LIMIT:
+                concat = "{:.3f}s".format(
+                    emit(ConcatVMWriter(address), size))
+            else:
+                concat = "skipped"
+            chunks = emit(VMWriter(address), size)
+            flushed = emit(VMWriter(address, 65536), size)
+            print("{:>9} {:>10} {:>9.3f}s {:>13.3f}s".format(
+                size, concat, chunks, flushed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""
+Deterministic generator of valid Jack programs for benchmarking. Every
+dimension of the workload scales on its own: the number of classes, the
+subroutines of each class, the statements of each subroutine, the depth of
+expressions, the share of statements using string literals and the number
+of distinct local variables.
+
+Run as a module to write a program to a directory:
+    python3 -m benchmarks.generator DIRECTORY [preset]
+"""
+import os
+import random
+import sys
+
+# Workloads by name, see generate_program for the meaning of each parameter
+PRESETS = {
+    "small": dict(classes=4, subroutines=4, statements=20, depth=2,
+                  strings=0.1, identifiers=4),
+    "wide": dict(classes=64, subroutines=8, statements=20, depth=2,
+                 strings=0.1, identifiers=8),
+    "long": dict(classes=2, subroutines=4, statements=2000, depth=2,
+                 strings=0.1, identifiers=16),
+    "deep": dict(classes=4, subroutines=4, statements=30, depth=6,
+                 strings=0.0, identifiers=8),
+    "strings": dict(classes=8, subroutines=4, statements=50, depth=1,
+                    strings=0.8, identifiers=4),
+}
+_OPS = ("+", "-", "*", "/", "&", "|", "<", ">", "=")
+_WORDS = ("alpha", "beta", "gamma", "delta", "Hello, world", "x < y & z",
+          "\\ back slash", "The quick brown fox jumps over the lazy dog")
+# Local variables every subroutine declares besides the generated ones
+_ARRAY = "arr"
+_STRING = "str"
+
+
+class _ClassWriter:
+    """
+    Writes the source of a single class.
+    """
+
+    def __init__(self, rng, name, class_names, params):
+        """
+        :param rng: The random.Random to draw from.
+        :param name: The name of the class.
+        :param class_names: The names of all classes of the program.
+        :param params: The parameters of generate_program.
+        """
+        self.rng = rng
+        self.name = name
+        self.class_names = class_names
+        self.params = params
+        self.locals = ["v{}".format(i)
+                       for i in range(max(1, params["identifiers"]))]
+        self.lines = []
+
+    def write(self):
+        """
+        :return: The source of the class.
+        """
+        params = self.params
+        self.lines.append("class {} {{".format(self.name))
+        self.lines.append("    field int x, y;")
+        self.lines.append("    static int count;")
+        self.lines.append("")
+        self.lines.append("    constructor {} new(int ax, int ay) {{".format(
+            self.name))
+        self.lines.append("        let x = ax;")
+        self.lines.append("        let y = ay;")
+        self.lines.append("        return this;")
+        self.lines.append("    }")
+        for index in range(params["subroutines"]):
+            self.__subroutine(index)
+        self.lines.append("}")
+        self.lines.append("")
+        return "\n".join(self.lines)
+
+    def __subroutine(self, index):
+        kind = "method" if index % 2 else "function"
+        self.lines.append("")
+        self.lines.append("    {} int f{}(int a, int b) {{".format(kind,
+                                                                  index))
+        self.lines.append("        var int {};".format(", ".join(
+            self.locals)))
+        self.lines.append("        var Array {};".format(_ARRAY))
+        self.lines.append("        var String {};".format(_STRING))
+        self.lines.append("        let {} = Array.new(16);".format(_ARRAY))
+        remaining = self.params["statements"]
+        while remaining > 0:
+            remaining -= self.__statement(2, remaining)
+        self.lines.append("        return {};".format(self.__expression(
+            self.params["depth"])))
+        self.lines.append("    }")
+
+    def __statement(self, indent, budget):
+        """
+        Writes one statement, which may nest others.
+        :param indent: The indentation depth, in levels of 4 spaces.
+        :param budget: The most statements to write.
+        :return: The number of statements written.
+        """
+        rng = self.rng
+        pad = "    " * indent
+        depth = self.params["depth"]
+        if rng.random() < self.params["strings"]:
+            string = rng.choice(_WORDS)
+            if rng.random() < 0.5:
+                self.lines.append("{}do Output.printString(\"{}\");".format(
+                    pad, string))
+            else:
+                self.lines.append("{}let {} = \"{}\";".format(pad, _STRING,
+                                                              string))
+            return 1
+        choice = rng.random()
+        if budget >= 3 and choice < 0.15:
+            self.lines.append("{}if ({}) {{".format(
+                pad, self.__expression(depth)))
+            written = 1 + self.__statement(indent + 1, budget - 2)
+            self.lines.append("{}}} else {{".format(pad))
+            written += self.__statement(indent + 1, budget - written)
+            self.lines.append("{}}}".format(pad))
+            return written
+        if budget >= 2 and choice < 0.25:
+            self.lines.append("{}while ({}) {{".format(
+                pad, self.__expression(depth)))
+            written = 1 + self.__statement(indent + 1, budget - 1)
+            self.lines.append("{}}}".format(pad))
+            return written
+        if choice < 0.4:
+            self.lines.append("{}do {};".format(pad, self.__call(depth)))
+        elif choice < 0.55:
+            self.lines.append("{}let {}[{}] = {};".format(
+                pad, _ARRAY, self.__expression(1), self.__expression(depth)))
+        else:
+            self.lines.append("{}let {} = {};".format(
+                pad, rng.choice(self.locals), self.__expression(depth)))
+        return 1
+
+    def __expression(self, depth):
+        """
+        :param depth: The depth of nested operations in the expression.
+        :return: The source of an expression.
+        """
+        rng = self.rng
+        if depth <= 0:
+            return self.__term()
+        choice = rng.random()
+        if choice < 0.1:
+            return "-({})".format(self.__expression(depth - 1))
+        if choice < 0.2:
+            return self.__call(depth - 1)
+        return "({} {} {})".format(self.__expression(depth - 1),
+                                   rng.choice(_OPS),
+                                   self.__expression(depth - 1))
+
+    def __term(self):
+        rng = self.rng
+        choice = rng.random()
+        if choice < 0.3:
+            return str(rng.randrange(0, 32768))
+        if choice < 0.4:
+            return rng.choice(("a", "b", "true", "false", "null"))
+        if choice < 0.5:
+            return "{}[{}]".format(_ARRAY, rng.randrange(0, 16))
+        return rng.choice(self.locals)
+
+    def __call(self, depth):
+        rng = self.rng
+        subroutines = self.params["subroutines"]
+        if subroutines == 0:
+            return "Math.abs({})".format(self.__expression(depth))
+        target = rng.choice(self.class_names)
+        return "{}.f{}({}, {})".format(target, 2 * rng.randrange(
+            (subroutines + 1) // 2), self.__expression(depth),
+            self.__expression(depth))
+
+
+def generate_program(directory, classes, subroutines, statements, depth,
+                     strings, identifiers, seed=0):
+    """
+    Writes a program of generated classes to a directory, always the same
+    for the same parameters.
+    :param directory: The directory to write the jack files to.
+    :param classes: The number of classes, besides Main.
+    :param subroutines: The number of subroutines of each class, besides
+    its constructor.
+    :param statements: The number of statements of each subroutine.
+    :param depth: The depth of nested operations in expressions.
+    :param strings: The share of statements using a string literal.
+    :param identifiers: The number of local variables of each subroutine.
+    :param seed: The seed of the random choices.
+    :return: The addresses of the written files, sorted.
+    """
+    params = dict(subroutines=subroutines, statements=statements,
+                  depth=depth, strings=strings, identifiers=identifiers)
+    rng = random.Random(seed)
+    names = ["C{}".format(index) for index in range(classes)]
+    os.makedirs(directory, exist_ok=True)
+    addresses = []
+    for name in names:
+        address = os.path.join(directory, name + ".jack")
+        with open(address, "w") as f:
+            f.write(_ClassWriter(rng, name, names, params).write())
+        addresses.append(address)
+    address = os.path.join(directory, "Main.jack")
+    with open(address, "w") as f:
+        f.write(_main_class(names))
+    addresses.append(address)
+    return sorted(addresses)
+
+
+def _main_class(names):
+    """
+    :return: The source of a Main class calling the first subroutine of
+    every class.
+    """
+    lines = ["class Main {", "    function void main() {"]
+    for name in names:
+        lines.append("        do {}.f0(1, 2);".format(name))
+    lines += ["        return;", "    }", "}", ""]
+    return "\n".join(lines)
+
+
+def main():
+    directory = sys.argv[1]
+    preset = sys.argv[2] if len(sys.argv) > 2 else "small"
+    for address in generate_program(directory, **PRESETS[preset]):
+        print(address)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+"""
+Benchmark runner: generates the preset workloads of benchmarks.generator
+and measures, for each of them, the Tokenizer (with its token xml), the
+CompilationEngine and JackAnalyzer end to end. Each measurement runs in a
+fresh interpreter of its own, as the build invokes the compiler, so that
+its time includes the interpreter's startup and its peak RSS is its own.
+Reports tokens/s, lines/s, peak RSS and output size.
+
+    python3 -m benchmarks.runner [--preset NAME]... [--repeat N]
+                                 [--threshold FRACTION] [--record]
+                                 [--strict] [--save-outputs]
+
+The output sizes do not depend on the machine. They are checked against
+benchmarks/baselines.json, and the run exits with status 1 if any of them
+changed. --save-outputs stores the new sizes when the generated code is
+meant to change.
+
+Speed and memory only compare on the same machine. Record them there with
+--record before a change, into benchmarks/machine_baselines.json, which is
+not committed:
+
+    python3 -m benchmarks.runner --record
+    (make the change)
+    python3 -m benchmarks.runner
+
+Later runs report every throughput that fell, and every peak RSS that grew,
+by more than the threshold since the record. These reports are advisory,
+unless --strict makes them fail the run as well.
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from JackTokenizer import Tokenizer
+from benchmarks.generator import PRESETS, generate_program
+
+TARGETS = ("tokenizer", "engine", "analyzer")
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "baselines.json")
+# The measures recorded on this machine, see --record
+MACHINE_BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 "machine_baselines.json")
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_REPEAT = 3
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The output files of each target, by their suffix
+_OUTPUT_SUFFIXES = {"tokenizer": "T.xml", "engine": ".vm", "analyzer": ".vm"}
+
+
+def run_target(target, directory):
+    """
+    Runs a target over the jack files of a directory, in this process.
+    :param target: One of TARGETS.
+    :param directory: The directory of the jack files.
+    """
+    if target == "analyzer":
+        import JackAnalyzer
+        sys.argv = ["JackAnalyzer", "--no-cache", directory]
+        JackAnalyzer.main()
+        return
+    from CompilationEngine import CompilationEngine
+    for address in sorted(glob.glob(os.path.join(directory, "*.jack"))):
+        if target == "tokenizer":
+            Tokenizer(address).write_file()
+        else:
+            CompilationEngine(address).write_file()
+
+
+def peak_rss():
+    """
+    :return: The peak RSS of this process, in KB.
+    """
+    # ru_maxrss also counts the memory of the parent the process was forked
+    # from, the high water mark of the process's own memory does not
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(target, directory):
+    """
+    Runs a target once in a fresh interpreter.
+    :return: The wall seconds and the peak RSS in KB of the run.
+    """
+    command = [sys.executable, "-m", "benchmarks.runner", "--worker", target,
+               directory]
+    start = time.perf_counter()
+    output = subprocess.run(command, cwd=REPO_DIR, check=True,
+                            stdout=subprocess.PIPE, text=True).stdout
+    elapsed = time.perf_counter() - start
+    # The worker reports its peak RSS on its last line
+    return elapsed, int(output.split()[-1])
+
+
+def output_size(target, directory):
+    """
+    :return: The total size of the target's output files, in bytes.
+    """
+    pattern = os.path.join(directory, "*" + _OUTPUT_SUFFIXES[target])
+    return sum(os.path.getsize(address) for address in glob.glob(pattern))
+
+
+def bench_preset(name, repeat):
+    """
+    Generates a preset workload and measures every target on it.
+    :param name: The name of the preset.
+    :param repeat: The number of runs of each target, the fastest counts.
+    :return: The results of each target, by its name.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        addresses = generate_program(directory, **PRESETS[name])
+        tokens = 0
+        lines = 0
+        for address in addresses:
+            tokenizer = Tokenizer(address)
+            tokens += tokenizer.token_count()
+            lines += tokenizer.source.count("\n")
+        results = {}
+        for target in TARGETS:
+            runs = [measure(target, directory) for _ in range(repeat)]
+            seconds = min(elapsed for elapsed, _ in runs)
+            results[target] = {
+                "seconds": seconds,
+                "tokens_per_s": tokens / seconds,
+                "lines_per_s": lines / seconds,
+                "peak_rss_kb": max(rss for _, rss in runs),
+                "output_bytes": output_size(target, directory),
+            }
+    return results
+
+
+def output_changes(results, sizes):
+    """
+    :param results: The results of a preset, by target.
+    :param sizes: The expected output sizes of the preset, by target.
+    :return: Messages describing the output sizes that changed.
+    """
+    messages = []
+    for target, result in results.items():
+        size = sizes.get(target)
+        if size is not None and result["output_bytes"] != size:
+            messages.append("{}: output_bytes changed from {} to {}".format(
+                target, size, result["output_bytes"]))
+    return messages
+
+
+def slowdowns(results, baseline, threshold):
+    """
+    :param results: The results of a preset, by target.
+    :param baseline: The results of the preset recorded on this machine,
+    by target.
+    :param threshold: The fraction a measure may worsen by.
+    :return: Messages describing the measures that worsened.
+    """
+    messages = []
+    for target, result in results.items():
+        base = baseline.get(target)
+        if base is None:
+            continue
+        for measure_name in ("tokens_per_s", "lines_per_s"):
+            if result[measure_name] < base[measure_name] * (1 - threshold):
+                messages.append("{}: {} fell from {:.0f} to {:.0f}".format(
+                    target, measure_name, base[measure_name],
+                    result[measure_name]))
+        if result["peak_rss_kb"] > base["peak_rss_kb"] * (1 + threshold):
+            messages.append("{}: peak_rss_kb grew from {} to {}".format(
+                target, base["peak_rss_kb"], result["peak_rss_kb"]))
+    return messages
+
+
+def load_json(address):
+    """
+    :return: The json object in the file, an empty dict if it does not
+    exist.
+    """
+    try:
+        with open(address) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_json(address, value):
+    with open(address, "w") as f:
+        json.dump(value, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="benchmarks.runner")
+    parser.add_argument("--preset", action="append", choices=sorted(PRESETS),
+                        help="a workload to run, may be repeated (default: "
+                             "all of them)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="runs of each target, the fastest counts "
+                             "(default: %(default)s)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="the fraction a measure may worsen by, since "
+                             "the record of this machine, before it is "
+                             "reported (default: %(default)s)")
+    parser.add_argument("--record", action="store_true",
+                        help="record the measures as this machine's "
+                             "baseline, to compare later runs with")
+    parser.add_argument("--strict", action="store_true",
+                        help="fail the run when a measure worsened since "
+                             "the record, not only when an output size "
+                             "changed")
+    parser.add_argument("--save-outputs", action="store_true",
+                        help="store the output sizes as the expected ones")
+    parser.add_argument("--worker", nargs=2, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    if args.worker:
+        run_target(*args.worker)
+        print(peak_rss())
+        return
+    sizes = load_json(BASELINES)
+    machine = load_json(MACHINE_BASELINES)
+    failed = False
+    print("{:<8} {:<10} {:>8} {:>12} {:>10} {:>10} {:>12}".format(
+        "preset", "target", "seconds", "tokens/s", "lines/s", "rss KB",
+        "output B"))
+    for name in args.preset or sorted(PRESETS):
+        results = bench_preset(name, args.repeat)
+        for target, result in results.items():
+            print("{:<8} {:<10} {:>8.3f} {:>12.0f} {:>10.0f} {:>10} "
+                  "{:>12}".format(name, target, result["seconds"],
+                                  result["tokens_per_s"],
+                                  result["lines_per_s"],
+                                  result["peak_rss_kb"],
+                                  result["output_bytes"]))
+        if args.save_outputs:
+            sizes[name] = {target: result["output_bytes"]
+                           for target, result in results.items()}
+        else:
+            for message in output_changes(results, sizes.get(name, {})):
+                failed = True
+                print("REGRESSION {}: {}".format(name, message))
+        if args.record:
+            machine[name] = results
+            continue
+        for message in slowdowns(results, machine.get(name, {}),
+                                 args.threshold):
+            failed = failed or args.strict
+            print("{} {}: {}".format(
+                "REGRESSION" if args.strict else "slower", name, message))
+    if args.save_outputs:
+        save_json(BASELINES, sizes)
+    if args.record:
+        save_json(MACHINE_BASELINES, machine)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+"""
+Jack snippets compiled in memory, shared by the tests of the code
+generator.
+"""
+from CompilationEngine import compile_source
+
+FUNCTION = """
+class Main {
+    function int f(int a) {
+        return %s;
+    }
+}
+"""
+
+
+def returned(expression, **options):
+    """
+    :param expression: A jack expression, of the function argument a.
+    :param options: Keyword arguments for the Compiler.
+    :return: The commands of the return statement of a function returning
+    the expression, without the function command and the return.
+    """
+    return compile_source(FUNCTION % expression, **options).splitlines()[1:-1]
@@ -0,0 +1,70 @@
+import io
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import JackClient
+from CompileProtocol import SOCKET_ENV
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE = """
+class Main {
+    function void main() {
+        return;
+    }
+}
+"""
+
+
+class ClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.address = os.path.join(self.directory.name, "Main.jack")
+        with open(self.address, "w") as f:
+            f.write(SOURCE)
+        self.socket = os.path.join(self.directory.name, "server.sock")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_manifest_from_stdin_without_server(self):
+        result = subprocess.run(
+            [sys.executable, "JackClient.py", "--no-cache", "--files-from",
+             "-"], cwd=REPO_DIR, input=self.address + "\n", text=True,
+            capture_output=True, env=dict(os.environ,
+                                          **{SOCKET_ENV: self.socket}))
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('"status": "ok"', result.stdout)
+        self.assertTrue(os.path.exists(self.address[:-5] + ".vm"))
+
+    def test_stdin_is_kept_when_server_goes_away(self):
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket)
+        server.listen(1)
+        server.settimeout(10)
+
+        def hang_up():
+            try:
+                connection, _ = server.accept()
+            except OSError:
+                return
+            connection.close()
+
+        thread = threading.Thread(target=hang_up)
+        thread.start()
+        argv = ["--socket", self.socket, "--files-from", "-"]
+        with mock.patch.object(sys, "stdin", io.StringIO(self.address)):
+            self.assertIsNone(JackClient.forward(argv))
+            self.assertEqual(sys.stdin.read(), self.address)
+        thread.join()
+        server.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
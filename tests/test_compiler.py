@@ -0,0 +1,94 @@
+import io
+import unittest
+from contextlib import redirect_stdout, redirect_stderr
+
+import JackAnalyzer
+from CompilationEngine import compile_source
+from CompileServer import CompileServer
+from Diagnostics import CompileError
+
+SOURCE = """
+class Main {
+    function void main() {
+        do Output.printInt(1 + 2);
+        return;
+    }
+}
+"""
+
+
+class CompilerTest(unittest.TestCase):
+
+    def test_compile(self):
+        self.assertEqual(compile_source(SOURCE).splitlines(), [
+            "function Main.main 0", "push constant 3",
+            "call Output.printInt 1", "pop temp 0", "push constant 0",
+            "return"])
+
+    def test_syntax_error_raises_without_output(self):
+        out = io.StringIO()
+        with redirect_stdout(out), redirect_stderr(out):
+            with self.assertRaises(CompileError) as context:
+                compile_source("class Main { function void main( }")
+        self.assertEqual(out.getvalue(), "")
+        self.assertEqual(context.exception.diagnostics[0].line, 1)
+
+    def test_class_name_is_checked(self):
+        with self.assertRaises(ValueError):
+            compile_source(SOURCE, class_name="Other")
+
+
+class ServerCompileSourceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = CompileServer(JackAnalyzer.run,
+                                    JackAnalyzer.optimization_passes)
+
+    def test_vm(self):
+        response = self.server.compile_source({"source": SOURCE})
+        self.assertEqual(response, {"status": 0,
+                                    "vm": compile_source(SOURCE)})
+
+    def test_diagnostics(self):
+        response = self.server.compile_source(
+            {"source": "class Main { function void main( }"})
+        self.assertEqual(response["status"], 1)
+        self.assertEqual(response["diagnostics"], [
+            {"line": 1, "column": 34,
+             "message": "expected ')', found '}'"}])
+
+    def test_bad_options(self):
+        for options in ({"inline_threshold": None},
+                        {"inline_threshold": "8"}, ["optimize"], 3):
+            response = self.server.compile_source({"source": SOURCE,
+                                                   "options": options})
+            self.assertEqual(response["status"], 1, options)
+            self.assertIn("ValueError", response["error"])
+
+    def test_options(self):
+        response = self.server.compile_source(
+            {"source": SOURCE, "options": {"optimize": True,
+                                           "inline_threshold": 0}})
+        self.assertEqual(response["status"], 0)
+
+    def test_missing_source(self):
+        response = self.server.compile_source({"options": {}})
+        self.assertEqual(response["status"], 1)
+
+
+class ServerRunCommandTest(unittest.TestCase):
+
+    def test_long_running_modes_are_refused(self):
+        server = CompileServer(JackAnalyzer.run,
+                               JackAnalyzer.optimization_passes)
+        for arg in ("--watch", "--serve"):
+            response = server.run_command({"argv": [arg, "."]})
+            self.assertEqual(response["status"], 2)
+        # Abbreviations are not options at all
+        response = server.run_command({"argv": ["--wat", "."]})
+        self.assertEqual(response["status"], 2)
+        self.assertIn("unrecognized arguments: --wat", response["stderr"])
+
+
+if __name__ == '__main__':
+    unittest.main()
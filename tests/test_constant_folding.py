@@ -0,0 +1,57 @@
+import unittest
+
+from ConstantFolder import fold_binary, fold_unary, TRUE, FALSE
+from tests.snippets import returned
+
+
+class ConstantFolderTest(unittest.TestCase):
+
+    def test_wraparound(self):
+        self.assertEqual(fold_binary("+", 32767, 1), -32768)
+        self.assertEqual(fold_binary("-", -32768, 1), 32767)
+        self.assertEqual(fold_binary("*", 256, 256), 0)
+        self.assertEqual(fold_binary("*", 300, 300), 24464)
+        self.assertEqual(fold_unary("-", -32768), -32768)
+
+    def test_division_rounds_toward_zero(self):
+        self.assertEqual(fold_binary("/", 7, 2), 3)
+        self.assertEqual(fold_binary("/", -7, 2), -3)
+        self.assertEqual(fold_binary("/", 7, -2), -3)
+        self.assertEqual(fold_binary("/", -32768, -1), -32768)
+
+    def test_division_by_zero_is_not_folded(self):
+        self.assertIsNone(fold_binary("/", 1, 0))
+
+    def test_booleans(self):
+        self.assertEqual(fold_binary("<", 1, 2), TRUE)
+        self.assertEqual(fold_binary("=", 1, 2), FALSE)
+        self.assertEqual(fold_unary("~", FALSE), TRUE)
+
+
+class FoldingTest(unittest.TestCase):
+
+    def test_expression_is_folded(self):
+        self.assertEqual(returned("(2 + 3) * 4"), ["push constant 20"])
+
+    def test_negative_result(self):
+        self.assertEqual(returned("3 - 5"), ["push constant 2", "neg"])
+
+    def test_true(self):
+        self.assertEqual(returned("1 < 2"), ["push constant 0", "not"])
+
+    def test_wraparound_to_most_negative(self):
+        self.assertEqual(returned("32767 + 1"),
+                         ["push constant 32767", "not"])
+
+    def test_division_by_zero_is_left_to_run_time(self):
+        self.assertEqual(returned("1 / 0"), ["push constant 1",
+                                             "push constant 0",
+                                             "call Math.divide 2"])
+
+    def test_variables_are_not_folded(self):
+        self.assertEqual(returned("a + (1 + 2)"),
+                         ["push argument 0", "push constant 3", "add"])
+
+
+if __name__ == '__main__':
+    unittest.main()
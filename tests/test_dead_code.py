@@ -0,0 +1,79 @@
+import unittest
+
+from CompilationEngine import compile_source
+from DeadCodeEliminator import DeadCodeEliminator
+from SourceMap import SourceLine
+
+
+class DeadCodeEliminatorTest(unittest.TestCase):
+
+    def optimize(self, commands):
+        return DeadCodeEliminator().run(list(commands))
+
+    def test_code_after_return_is_removed(self):
+        self.assertEqual(self.optimize(["function Main.f 0",
+                                        "push constant 1", "return",
+                                        "push constant 2", "return"]),
+                         ["function Main.f 0", "push constant 1", "return"])
+
+    def test_true_branch_becomes_goto(self):
+        self.assertEqual(self.optimize(["function Main.f 0",
+                                        "push constant 0", "not",
+                                        "if-goto L", "push constant 1",
+                                        "return", "label L",
+                                        "push constant 2", "return"]),
+                         ["function Main.f 0", "push constant 2", "return"])
+
+    def test_false_branch_is_removed(self):
+        self.assertEqual(self.optimize(["function Main.f 0",
+                                        "push constant 0", "if-goto L",
+                                        "push constant 1", "return",
+                                        "label L", "push constant 2",
+                                        "return"]),
+                         ["function Main.f 0", "push constant 1", "return"])
+
+    def test_branch_on_variable_is_kept(self):
+        commands = ["function Main.f 0", "push argument 0", "if-goto L",
+                    "push constant 1", "return", "label L",
+                    "push constant 2", "return"]
+        self.assertEqual(self.optimize(commands), commands)
+
+    def test_comments_are_kept(self):
+        self.assertEqual(self.optimize(["function Main.f 0", "return",
+                                        "// table", "push constant 1"]),
+                         ["function Main.f 0", "return", "// table"])
+
+    def test_loop_is_kept(self):
+        commands = ["function Main.f 0", "label L", "push argument 0",
+                    "if-goto L", "push constant 0", "return"]
+        self.assertEqual(self.optimize(commands), commands)
+
+    def test_folded_branch_keeps_source_line(self):
+        optimized = self.optimize(["function Main.f 0", "label L",
+                                   "push argument 0", "pop local 0",
+                                   SourceLine("push constant 0", 5), "not",
+                                   "if-goto L"])
+        self.assertEqual(optimized, ["function Main.f 0", "label L",
+                                     "push argument 0", "pop local 0",
+                                     "goto L"])
+        self.assertEqual(optimized[-1].line, 5)
+
+    def test_statements_after_return(self):
+        vm = compile_source("""
+class Main {
+    function int f() {
+        return 1;
+        do Output.printInt(2);
+    }
+}""", passes=[DeadCodeEliminator()])
+        self.assertNotIn("Output.printInt", vm)
+
+    def test_stats_count_removed_commands(self):
+        eliminator = DeadCodeEliminator()
+        eliminator.run(["function Main.f 0", "push constant 1", "return",
+                        "push constant 2", "return"])
+        self.assertEqual(eliminator.stats, {"Main.f": 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import random
+import unittest
+
+from JackTokenizer import Tokenizer, IncrementalTokenizer
+
+SOURCE = """class Main {
+    /* The entry point */
+    function void main() {
+        var int count;
+        let count = 12;  // a comment
+        do Output.printString("count");
+        return;
+    }
+}
+"""
+
+
+class IncrementalTokenizerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tokenizer = IncrementalTokenizer(text=SOURCE)
+        self.source = SOURCE
+
+    def edit(self, offset, deleted, inserted):
+        """
+        Applies an edit to the tokenizer and checks it against tokenizing
+        the edited source from scratch.
+        """
+        self.tokenizer.apply_edit(offset, deleted, inserted)
+        self.source = self.source[:offset] + inserted + \
+            self.source[offset + deleted:]
+        self.assertTokens()
+
+    def assertTokens(self):
+        expected = Tokenizer(text=self.source)
+        self.tokenizer.settle()
+        self.assertEqual(self.tokenizer.source, self.source)
+        self.assertEqual(list(self.tokenizer.kinds), list(expected.kinds))
+        self.assertEqual(list(self.tokenizer.starts), list(expected.starts))
+        self.assertEqual(list(self.tokenizer.ends), list(expected.ends))
+
+    def test_insert_into_identifier(self):
+        self.edit(self.source.index("count;"), 0, "er")
+
+    def test_delete(self):
+        self.edit(self.source.index("12"), 1, "")
+        self.edit(self.source.index("var"), len("var int count;"), "")
+
+    def test_edit_at_start_and_end(self):
+        self.edit(0, 0, "// header\n")
+        self.edit(len(self.source), 0, "class")
+        self.edit(0, len("// header\n"), "")
+
+    def test_open_and_close_string(self):
+        offset = self.source.index("12")
+        self.edit(offset, 0, '"')
+        self.edit(offset + 1, 0, 'a"')
+
+    def test_close_string_by_deleting_quote(self):
+        offset = self.source.index('"count"')
+        self.edit(offset + len('"count'), 1, "")
+        self.edit(offset + len('"count'), 0, '"')
+
+    def test_open_and_close_comment(self):
+        offset = self.source.index("var")
+        self.edit(offset, 0, "/*")
+        close = self.source.index("return")
+        self.edit(close, 0, "*/")
+        self.edit(offset, 2, "")
+
+    def test_close_comment_by_deleting_end(self):
+        end = self.source.index("*/")
+        self.edit(end, 2, "")
+        self.edit(end, 0, "*/")
+
+    def test_split_comment_end(self):
+        end = self.source.index("*/")
+        self.edit(end + 1, 0, " ")
+        self.edit(end + 1, 1, "")
+
+    def test_random_edits(self):
+        rng = random.Random(0)
+        pieces = ["a", "1", " ", "\n", '"', "/*", "*/", "//", "/", "*",
+                  ";", "{", "let", "#"]
+        for _ in range(300):
+            offset = rng.randrange(len(self.source) + 1)
+            deleted = rng.randrange(min(3, len(self.source) - offset) + 1)
+            inserted = "".join(rng.choice(pieces)
+                               for _ in range(rng.randrange(3)))
+            self.edit(offset, deleted, inserted)
+
+    def test_edit_outside_source(self):
+        with self.assertRaises(ValueError):
+            self.tokenizer.apply_edit(len(SOURCE), 1, "")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from CompilationEngine import compile_source
+from tests.vm import VM
+
+SOURCE = """
+class Main {
+    static int count;
+
+    function void main() {
+        var int i;
+        let i = 0;
+        while (i < 3) {
+            do Output.printString("hi");
+            do Output.printString("yo");
+            do Main.greet();
+            let i = i + 1;
+        }
+        return;
+    }
+
+    function void greet() {
+        do Output.printString("hi");
+        return;
+    }
+}
+"""
+
+
+def run(**options):
+    """
+    :return: The VM that ran Main.main, compiled with the options.
+    """
+    vm = VM({"Main": compile_source(SOURCE, **options)})
+    vm.call("Main.main")
+    return vm
+
+
+class InterningTest(unittest.TestCase):
+
+    def test_same_output(self):
+        self.assertEqual(run(intern_strings=True).output, run().output)
+        self.assertEqual(run().output, ["hi", "yo", "hi"] * 3)
+
+    def test_each_literal_is_built_once(self):
+        self.assertEqual(run().os_calls["String.new"], 9)
+        self.assertEqual(run(intern_strings=True).os_calls["String.new"], 2)
+
+    def test_one_static_per_distinct_literal(self):
+        vm = compile_source(SOURCE, intern_strings=True)
+        # After the class's own static 0
+        self.assertEqual(vm.splitlines()[-3:], ['// string literals of Main',
+                                                '// static 1: "hi"',
+                                                '// static 2: "yo"'])
+        self.assertEqual(run(intern_strings=True).statics.keys(),
+                         {("Main", 1), ("Main", 2)})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout, redirect_stderr
+from unittest import mock
+
+import JackAnalyzer
+
+SOURCE = """
+class %s {
+    function void f() {
+        return;
+    }
+}
+"""
+
+
+class ManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.files = []
+        for name in ("A", "B"):
+            address = os.path.join(self.directory.name, name + ".jack")
+            with open(address, "w") as f:
+                f.write(SOURCE % name)
+            self.files.append(address)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_analyzer(self, argv):
+        """
+        :return: The exit status and the json status lines of a run.
+        """
+        out = io.StringIO()
+        with redirect_stdout(out), redirect_stderr(io.StringIO()):
+            status = JackAnalyzer.run(["--no-cache"] + argv)
+        return status, [json.loads(line) for line in
+                        out.getvalue().splitlines()]
+
+    def test_manifest_file(self):
+        manifest = os.path.join(self.directory.name, "files.txt")
+        with open(manifest, "w") as f:
+            f.write("\n".join(self.files) + "\n\n")
+        status, lines = self.run_analyzer(["--files-from", manifest])
+        self.assertEqual(status, 0)
+        self.assertEqual([line["file"] for line in lines], self.files)
+        for address in self.files:
+            self.assertTrue(os.path.exists(address[:-5] + ".vm"))
+
+    def test_manifest_from_stdin(self):
+        vm_address = os.path.join(self.directory.name, "out.vm")
+        text = "{}\t{}\0{}".format(self.files[0], vm_address, self.files[1])
+        with mock.patch.object(sys, "stdin", io.StringIO(text)):
+            status, lines = self.run_analyzer(["--files-from", "-"])
+        self.assertEqual(status, 0)
+        self.assertEqual([line["output"] for line in lines],
+                         [vm_address, self.files[1][:-5] + ".vm"])
+        with open(vm_address) as f:
+            self.assertEqual(f.readline(), "function A.f 0\n")
+
+    def test_errors_are_reported_per_file(self):
+        with open(self.files[1], "w") as f:
+            f.write("class B {")
+        with mock.patch.object(sys, "stdin",
+                               io.StringIO("\n".join(self.files))):
+            status, lines = self.run_analyzer(["--files-from=-"])
+        self.assertEqual(status, 1)
+        self.assertEqual([line["status"] for line in lines], ["ok", "error"])
+        self.assertEqual(lines[1]["errors"][0]["line"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+from CompilationEngine import Compiler, compile_source
+from Diagnostics import CompileError
+
+MANY_ERRORS = """class Bad {
+    field int x y;
+
+    method void f(int a int b) {
+        let a = 3 +;
+        do Output.printInt(a)
+        while (a) { let a = a - 1; foo = 2; }
+        return;
+    }
+
+    field int late;
+
+    function void h() {
+        let x = "unterminated;
+        return;
+    }
+}
+"""
+
+
+class ParserRecoveryTest(unittest.TestCase):
+
+    def diagnostics(self, source):
+        """
+        :return: The diagnostics of compiling the source, as strings.
+        """
+        with self.assertRaises(CompileError) as context:
+            compile_source(source)
+        return [str(diagnostic)
+                for diagnostic in context.exception.diagnostics]
+
+    def test_every_error_is_reported(self):
+        self.assertEqual(self.diagnostics(MANY_ERRORS), [
+            "2:17: expected ';', found 'y'",
+            "4:25: expected ')', found 'int'",
+            "5:20: expected a term, found ';'",
+            "7:9: expected ';', found 'while'",
+            "7:36: expected a statement, found 'foo'",
+            "11:5: expected a subroutine declaration, found 'field'",
+            "14:17: expected a term, found '\"'",
+        ])
+
+    def test_missing_semicolon(self):
+        self.assertEqual(self.diagnostics(
+            "class A { function void f() { let x = 1 } }"),
+            ["1:41: expected ';', found '}'"])
+
+    def test_trailing_tokens(self):
+        self.assertEqual(self.diagnostics(
+            "class A { function void f() { return; } } junk"),
+            ["1:43: expected the end of the file, found 'junk'"])
+
+    def test_unknown_character(self):
+        self.assertEqual(self.diagnostics(
+            "class A { function void f() { let x = 3 # 4; return; } }"),
+            ["1:41: expected ';', found '#'"])
+
+    def test_message_counts_errors(self):
+        with self.assertRaises(CompileError) as context:
+            compile_source(MANY_ERRORS)
+        self.assertEqual(str(context.exception),
+                         "7 errors, the first at 2:17: expected ';', found "
+                         "'y'")
+
+    def test_compiler_is_reusable_after_errors(self):
+        compiler = Compiler()
+        with self.assertRaises(CompileError):
+            compiler.compile(MANY_ERRORS)
+        self.assertIn("function A.f 0", compiler.compile(
+            "class A { function void f() { return; } }"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+
+from CompilationEngine import compile_source
+from PeepholeOptimizer import PeepholeOptimizer
+
+IF_ELSE = """
+class Main {
+    function int f(int a) {
+        if (%s) { return 1; } else { return 2; }
+    }
+}
+"""
+
+
+class PeepholeOptimizerTest(unittest.TestCase):
+
+    def optimize(self, commands):
+        return PeepholeOptimizer().run(list(commands))
+
+    def test_double_not(self):
+        self.assertEqual(self.optimize(["push local 0", "not", "not",
+                                        "pop local 1"]),
+                         ["push local 0", "pop local 1"])
+
+    def test_add_zero(self):
+        self.assertEqual(self.optimize(["push local 0", "push constant 0",
+                                        "add", "pop local 1"]),
+                         ["push local 0", "pop local 1"])
+
+    def test_always_jump(self):
+        self.assertEqual(self.optimize(["label L", "push constant 0", "not",
+                                        "if-goto L"]),
+                         ["label L", "goto L"])
+
+    def test_never_jump(self):
+        self.assertEqual(self.optimize(["push constant 0", "if-goto L",
+                                        "return"]),
+                         ["return"])
+
+    def test_scratch_round_trip(self):
+        self.assertEqual(self.optimize(["pop temp 0", "push temp 0",
+                                        "return"]),
+                         ["return"])
+
+    def test_array_store_of_simple_push(self):
+        self.assertEqual(self.optimize(["push local 1", "pop temp 0",
+                                        "pop pointer 1", "push temp 0",
+                                        "pop that 0"]),
+                         ["pop pointer 1", "push local 1", "pop that 0"])
+
+    def test_array_store_of_that_is_kept(self):
+        commands = ["push that 0", "pop temp 0", "pop pointer 1",
+                    "push temp 0", "pop that 0"]
+        self.assertEqual(self.optimize(commands), commands)
+
+    def test_branch_over_goto_on_comparison(self):
+        self.assertEqual(self.optimize(["eq", "if-goto T", "goto F",
+                                        "label T", "return", "label F",
+                                        "return"]),
+                         ["eq", "not", "if-goto F", "return", "label F",
+                          "return"])
+
+    def test_branch_over_goto_on_negated_comparison(self):
+        self.assertEqual(self.optimize(["lt", "not", "if-goto T", "goto F",
+                                        "label T", "return", "label F",
+                                        "return"]),
+                         ["lt", "if-goto F", "return", "label F",
+                          "return"])
+
+    def test_branch_over_goto_on_integer_is_kept(self):
+        # not 5 is -6, which if-goto takes as true as well as 5
+        commands = ["push argument 0", "if-goto T", "goto F", "label T",
+                    "return", "label F", "return"]
+        self.assertEqual(self.optimize(commands), commands)
+        commands = ["and", "not", "if-goto T", "goto F", "label T",
+                    "return", "label F", "return"]
+        self.assertEqual(self.optimize(commands), commands)
+
+    def test_if_on_integer_condition(self):
+        for condition in ("a", "5", "a & 3"):
+            vm = compile_source(IF_ELSE % condition,
+                                passes=[PeepholeOptimizer()])
+            self.assertIn("if-goto IF_TRUE0", vm, condition)
+            self.assertIn("goto IF_FALSE1", vm, condition)
+
+    def test_unused_labels_are_removed(self):
+        self.assertEqual(self.optimize(["label A", "label B", "goto B"]),
+                         ["label B", "goto B"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+import JackAnalyzer
+from CompilationEngine import CompilationEngine
+from PeepholeOptimizer import PeepholeOptimizer
+from SourceMap import SourceMap, MAP_SUFFIX
+
+SOURCE = """class Main {
+    function int main() {
+        var int a;
+        let a = 7;
+        if (true) {
+            let a = 1;
+        }
+        while (false) {
+            let a = 2;
+        }
+        if (~(a < 3)) {
+            let a = 3;
+        }
+        return a;
+    }
+}
+"""
+
+
+class OptimizedSourceMapTest(unittest.TestCase):
+
+    def jack_lines(self, passes):
+        with tempfile.TemporaryDirectory() as directory:
+            address = os.path.join(directory, "Main.jack")
+            with open(address, "w") as f:
+                f.write(SOURCE)
+            CompilationEngine(address, passes=passes,
+                              source_map=True).write_file()
+            source_map = SourceMap.read(os.path.join(
+                directory, "Main.vm" + MAP_SUFFIX))
+        return list(source_map.jack_lines)
+
+    def test_peephole_keeps_lines_of_rewritten_commands(self):
+        self.assertEqual(self.jack_lines([PeepholeOptimizer()]),
+                         self.jack_lines(()))
+
+    def test_optimized_map(self):
+        passes = list(JackAnalyzer.optimization_passes().values())
+        # Nothing is left of the code of if (true) and while (false) but
+        # their bodies, if any
+        self.assertEqual(self.jack_lines(passes), [2, 4, 6, 11, 12, 14])
+
+if __name__ == '__main__':
+    unittest.main()
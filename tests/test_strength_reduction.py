@@ -0,0 +1,76 @@
+import unittest
+
+from ConstantFolder import to_word
+from tests.snippets import returned
+
+
+def evaluate(commands, argument):
+    """
+    Runs straight line vm code on the Hack word semantics.
+    :return: The value left on the stack.
+    """
+    stack = []
+    temp = [0] * 8
+    for command in commands:
+        words = command.split()
+        if words[0] == "push":
+            index = int(words[2])
+            stack.append({"constant": index, "argument": argument,
+                          "temp": temp[index]}[words[1]])
+        elif words[0] == "pop":
+            temp[int(words[2])] = stack.pop()
+        elif words[0] == "add":
+            right = stack.pop()
+            stack.append(to_word(stack.pop() + right))
+        elif words[0] == "neg":
+            stack.append(to_word(-stack.pop()))
+        elif words[0] == "not":
+            stack.append(to_word(~stack.pop()))
+        else:
+            raise ValueError(command)
+    return stack.pop()
+
+
+class StrengthReductionTest(unittest.TestCase):
+
+    def test_double(self):
+        self.assertEqual(returned("a * 2"), ["push argument 0",
+                                             "push argument 0", "add"])
+        self.assertEqual(returned("2 * a"), returned("a * 2"))
+
+    def test_trivial_factors(self):
+        self.assertEqual(returned("a * 1"), ["push argument 0"])
+        self.assertEqual(returned("a * 0"), ["push constant 0"])
+        self.assertEqual(returned("a * -1"), ["push argument 0", "neg"])
+        self.assertEqual(returned("a / 1"), ["push argument 0"])
+        self.assertEqual(returned("a / -1"), ["push argument 0", "neg"])
+
+    def test_side_effects_of_zero_product_are_kept(self):
+        self.assertEqual(returned("Main.f(1) * 0"),
+                         ["push constant 1", "call Main.f 1", "pop temp 0",
+                          "push constant 0"])
+
+    def test_products_are_exact(self):
+        for factor in (3, 5, 6, 7, 10, 100, -3, -12):
+            for operand in ("a", "(a + 1)"):
+                commands = returned("{} * {}".format(operand, factor),
+                                    inline_threshold=64)
+                self.assertNotIn("call Math.multiply 2", commands)
+                for value in (0, 1, -1, 7, -300, 32767, -32768):
+                    expected = to_word((value + (operand != "a")) * factor)
+                    self.assertEqual(evaluate(commands, value), expected,
+                                     (operand, factor, value))
+
+    def test_division_is_left_to_math(self):
+        self.assertEqual(returned("a / 2"), ["push argument 0",
+                                             "push constant 2",
+                                             "call Math.divide 2"])
+
+    def test_inline_threshold(self):
+        self.assertEqual(returned("a * 8", inline_threshold=0),
+                         ["push argument 0", "push constant 8",
+                          "call Math.multiply 2"])
+
+
+if __name__ == '__main__':
+    unittest.main()
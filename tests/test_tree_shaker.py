@@ -0,0 +1,31 @@
+import unittest
+
+from TreeShaker import TreeShaker
+
+MAIN = ["function Main.main 0", "call Main.used 0", "return",
+        "function Main.used 0", "return",
+        "function Main.unused 0", "return"]
+# An OS class of the program's own, called by the OS rather than the program
+MATH = ["function Math.init 0", "return",
+        "function Math.abs 1", "return"]
+
+
+class TreeShakerTest(unittest.TestCase):
+
+    def test_unreachable_functions_are_removed(self):
+        shaken = TreeShaker().shake({"Main.vm": MAIN})
+        self.assertEqual(shaken["Main.vm"], MAIN[:5])
+
+    def test_os_classes_are_kept(self):
+        shaker = TreeShaker()
+        shaken = shaker.shake({"Main.vm": MAIN, "Math.vm": MATH})
+        self.assertEqual(shaken["Math.vm"], MATH)
+        self.assertEqual(shaker.removed_functions, 1)
+
+    def test_library_is_kept(self):
+        library = {"Util.vm": ["function Util.f 0", "return"]}
+        self.assertEqual(TreeShaker().shake(library), library)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+A small interpreter of vm code, for the tests to run what the compiler
+generates. The OS is reduced to the functions the tests call: strings,
+printing, allocation, multiplication and division.
+"""
+from ConstantFolder import to_word, TRUE, FALSE
+
+_BINARY = {"add": lambda a, b: to_word(a + b),
+           "sub": lambda a, b: to_word(a - b),
+           "and": lambda a, b: a & b, "or": lambda a, b: a | b,
+           "eq": lambda a, b: TRUE if a == b else FALSE,
+           "gt": lambda a, b: TRUE if a > b else FALSE,
+           "lt": lambda a, b: TRUE if a < b else FALSE}
+_UNARY = {"neg": lambda a: to_word(-a), "not": lambda a: to_word(~a)}
+_HEAP = 2048
+
+
+class VM:
+    """
+    Runs the vm code of classes from a function, keeping what it prints.
+    """
+
+    def __init__(self, classes):
+        """
+        :param classes: The vm code of each class, by its name.
+        """
+        self.code = []
+        self.functions = {}
+        self.labels = {}
+        for class_name, text in classes.items():
+            function = None
+            for command in text.splitlines():
+                words = command.split()
+                if not words or words[0].startswith("//"):
+                    continue
+                if words[0] == "function":
+                    function = words[1]
+                    self.functions[function] = len(self.code)
+                elif words[0] == "label":
+                    self.labels[function, words[1]] = len(self.code)
+                self.code.append((words, class_name, function))
+        self.ram = {}
+        self.statics = {}
+        self.heap = _HEAP
+        self.output = []
+        self.strings = {}
+        # The number of calls of each OS function
+        self.os_calls = {}
+
+    def call(self, name, *args):
+        """
+        Runs a function to its return.
+        :return: Its return value.
+        """
+        stack = []
+        frames = []
+        local, argument, pointer = [], list(args), [0, 0]
+        pc = self.functions[name]
+        while True:
+            words, class_name, function = self.code[pc]
+            pc += 1
+            op = words[0]
+            if op == "function":
+                local = [0] * int(words[2])
+            elif op == "push":
+                stack.append(self.__read(words[1], int(words[2]), local,
+                                         argument, pointer, class_name))
+            elif op == "pop":
+                self.__write(words[1], int(words[2]), stack.pop(), local,
+                             argument, pointer, class_name)
+            elif op in _BINARY:
+                right = stack.pop()
+                stack.append(_BINARY[op](stack.pop(), right))
+            elif op in _UNARY:
+                stack.append(_UNARY[op](stack.pop()))
+            elif op == "goto":
+                pc = self.labels[function, words[1]]
+            elif op == "if-goto":
+                if stack.pop() != 0:
+                    pc = self.labels[function, words[1]]
+            elif op == "call":
+                count = int(words[2])
+                call_args = stack[len(stack) - count:]
+                del stack[len(stack) - count:]
+                if words[1] in self.functions:
+                    frames.append((pc, stack, local, argument, pointer))
+                    stack, argument = [], call_args
+                    pointer = [0, 0]
+                    pc = self.functions[words[1]]
+                else:
+                    stack.append(self.__os(words[1], call_args))
+            elif op == "return":
+                value = stack.pop()
+                if not frames:
+                    return value
+                pc, stack, local, argument, pointer = frames.pop()
+                stack.append(value)
+
+    def __read(self, segment, index, local, argument, pointer, class_name):
+        if segment == "constant":
+            return index
+        if segment == "local":
+            return local[index]
+        if segment == "argument":
+            return argument[index]
+        if segment == "static":
+            return self.statics.get((class_name, index), 0)
+        if segment == "pointer":
+            return pointer[index]
+        if segment == "temp":
+            return self.ram.get(5 + index, 0)
+        return self.ram.get(pointer[segment == "that"] + index, 0)
+
+    def __write(self, segment, index, value, local, argument, pointer,
+                class_name):
+        if segment == "local":
+            local[index] = value
+        elif segment == "argument":
+            argument[index] = value
+        elif segment == "static":
+            self.statics[class_name, index] = value
+        elif segment == "pointer":
+            pointer[index] = value
+        elif segment == "temp":
+            self.ram[5 + index] = value
+        else:
+            self.ram[pointer[segment == "that"] + index] = value
+
+    def __os(self, name, args):
+        self.os_calls[name] = self.os_calls.get(name, 0) + 1
+        if name in ("Memory.alloc", "Array.new", "String.new"):
+            address = self.heap
+            self.heap += max(args[0], 1)
+            self.strings[address] = ""
+            return address
+        if name == "String.appendChar":
+            self.strings[args[0]] += chr(args[1])
+            return args[0]
+        if name == "Output.printString":
+            self.output.append(self.strings[args[0]])
+        elif name == "Output.printInt":
+            self.output.append(str(args[0]))
+        elif name == "Math.multiply":
+            return to_word(args[0] * args[1])
+        elif name == "Math.divide":
+            quotient = abs(args[0]) // abs(args[1])
+            return to_word(-quotient if (args[0] < 0) != (args[1] < 0)
+                           else quotient)
+        return 0